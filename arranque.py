@@ -0,0 +1,124 @@
+import concurrent.futures
+import importlib
+import threading
+import time
+
+import numpy as np
+
+class GestorArranque:
+    """
+    Inicializa componentes pesados (cámara, detector, manos) en paralelo y
+    registra una línea de tiempo de cada uno, relativa al inicio del gestor.
+    Los importes diferidos (ModuloDiferido) también quedan en la línea de tiempo.
+    """
+    def __init__(self, max_hilos=3):
+        self.t0 = time.perf_counter()
+        self.ejecutor = concurrent.futures.ThreadPoolExecutor(max_hilos, thread_name_prefix="arranque")
+        self.componentes = {}  # nombre -> Future
+        self.eventos = []      # (nombre, inicio, fin, hilo, error)
+        self.lock = threading.Lock()
+
+    def _registrar(self, nombre, inicio, fin, error=None):
+        with self.lock:
+            self.eventos.append((nombre, inicio - self.t0, fin - self.t0,
+                                 threading.current_thread().name, error))
+
+    def _medir(self, nombre, fabrica):
+        inicio = time.perf_counter()
+        try:
+            resultado = fabrica()
+        except Exception as e:
+            self._registrar(nombre, inicio, time.perf_counter(), str(e))
+            print(f"⚠️ [ARRANQUE] {nombre} falló: {e}")
+            raise
+        self._registrar(nombre, inicio, time.perf_counter())
+        return resultado
+
+    def iniciar(self, nombre, fabrica):
+        """Lanza fabrica() en segundo plano; el resultado se pide con obtener(nombre)"""
+        self.componentes[nombre] = self.ejecutor.submit(self._medir, nombre, fabrica)
+
+    def listo(self, *nombres):
+        """True si todos los componentes indicados terminaron sin error (no bloquea)"""
+        for nombre in nombres:
+            futuro = self.componentes[nombre]
+            if not futuro.done() or futuro.exception() is not None:
+                return False
+        return True
+
+    def fallido(self, *nombres):
+        """(nombre, excepción) del primer componente indicado que terminó con error, o None (no bloquea)"""
+        for nombre in nombres:
+            futuro = self.componentes[nombre]
+            if futuro.done() and futuro.exception() is not None:
+                return nombre, futuro.exception()
+        return None
+
+    def obtener(self, nombre, timeout=None):
+        """Bloquea hasta que el componente esté listo (relanza su excepción si falló)"""
+        return self.componentes[nombre].result(timeout)
+
+    def esperar(self, timeout=None):
+        concurrent.futures.wait(self.componentes.values(), timeout)
+
+    def linea_de_tiempo(self):
+        with self.lock:
+            return sorted(self.eventos, key=lambda e: e[1])
+
+    def reporte(self, ancho=40):
+        """Imprime la línea de tiempo como barras (una columna = fin_total / ancho segundos)"""
+        eventos = self.linea_de_tiempo()
+        if not eventos: return
+        total = max(e[2] for e in eventos) or 1e-9
+        print(f"🕒 [ARRANQUE] Línea de tiempo ({total:.2f} s):")
+        for nombre, inicio, fin, hilo, error in eventos:
+            a, b = int(inicio / total * ancho), max(int(fin / total * ancho), int(inicio / total * ancho) + 1)
+            barra = " " * a + "█" * (b - a)
+            estado = f"  ⚠️ {error}" if error else ""
+            print(f"   {nombre:<22} {inicio:6.2f} → {fin:6.2f} s |{barra:<{ancho}}| {hilo}{estado}")
+
+    def cerrar(self):
+        self.ejecutor.shutdown(wait=False)
+
+class ModuloDiferido:
+    """
+    Módulo que se importa recién en el primer acceso a un atributo.
+    Si se pasa un GestorArranque, el tiempo de importación queda registrado.
+    """
+    def __init__(self, nombre, arranque=None):
+        self._nombre = nombre
+        self._arranque = arranque
+        self._modulo = None
+        self._lock = threading.Lock()
+
+    def _cargar(self):
+        with self._lock:
+            if self._modulo is None:
+                inicio = time.perf_counter()
+                self._modulo = importlib.import_module(self._nombre)
+                if self._arranque:
+                    self._arranque._registrar(f"import {self._nombre}", inicio, time.perf_counter())
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._modulo or self._cargar(), atributo)
+
+def calentar_manos(hands, ancho=640, alto=480, repeticiones=3):
+    """
+    Procesa frames sintéticos del tamaño de la cámara con una instancia de
+    MediaPipe Hands antes del primer frame real. Sin una mano real solo se
+    ejercita el detector de palmas y la inicialización del grafo; es lo que
+    causa la demora de la primera llamada (DetectorRoboflow.calentar hace lo
+    mismo con el modelo de tarjetas). Retorna (latencia_fria, latencia_caliente) en s.
+    """
+    frame = np.random.default_rng(0).integers(0, 256, (alto, ancho, 3), dtype=np.uint8)
+    tiempos = []
+    for _ in range(1 + repeticiones):
+        t0 = time.perf_counter()
+        hands.process(frame)
+        tiempos.append(time.perf_counter() - t0)
+
+    fria = tiempos[0]
+    caliente = float(np.median(tiempos[1:])) if repeticiones else tiempos[0]
+    print(f"🔥 [MANOS] Calentamiento: frío {fria * 1000:.1f} ms, caliente {caliente * 1000:.1f} ms")
+    return fria, caliente
@@ -0,0 +1,195 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from detector_ia import DetectorRoboflow
+from fuego import DetectorFuego
+import logica_manos as manos
+
+try:
+    import resource  # No existe en Windows
+except ImportError:
+    resource = None
+
+# --- CONFIGURACIÓN POR DEFECTO ---
+ETIQUETAS_MODELO = ["Tarjeta_Maestro", "Tarjeta_Jefe", "Tarjeta_Empleado"]
+MODELO_FILE = "modelo_tarjetas.tflite"
+ETAPAS = ["tarjetas", "manos", "fuego", "fuego_grilla"]
+
+def cargar_frames(ruta, ancho, alto, max_frames):
+    """Carga en memoria un video o un directorio de imágenes (sin cámara)"""
+    frames = []
+    if os.path.isdir(ruta):
+        archivos = sorted(glob.glob(os.path.join(ruta, "*.jpg")) + glob.glob(os.path.join(ruta, "*.png")))
+        for archivo in archivos[:max_frames]:
+            img = cv2.imread(archivo)
+            if img is not None:
+                frames.append(cv2.resize(img, (ancho, alto)))
+    else:
+        cap = cv2.VideoCapture(ruta)
+        while len(frames) < max_frames:
+            ret, img = cap.read()
+            if not ret: break
+            frames.append(cv2.resize(img, (ancho, alto)))
+        cap.release()
+    return frames
+
+# --- ETAPAS MEDIDAS ---
+class EtapaTarjetas:
+    def __init__(self, args):
+        self.detector = DetectorRoboflow(args.modelo, ETIQUETAS_MODELO)
+        self.backend = self.detector.backend
+        # Mismo calentamiento que el sistema en vivo; la primera inferencia se reporta aparte
+        self.detector.calentar()
+        self.latencia_fria = self.detector.latencia_fria
+
+    def __call__(self, frame):
+        return self.detector.detectar(frame, es_bgr=True)
+
+class EtapaManos:
+    def __init__(self, args):
+        import mediapipe as mp
+        self.hands = mp.solutions.hands.Hands(
+            static_image_mode=False, max_num_hands=2,
+            model_complexity=0, min_detection_confidence=0.6, min_tracking_confidence=0.5
+        )
+
+    def __call__(self, frame):
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        res = self.hands.process(rgb)
+        if res.multi_hand_landmarks:
+            for landmarks, handedness in zip(res.multi_hand_landmarks, res.multi_handedness):
+                label = handedness.classification[0].label
+                dedos = manos.analizar_dedos(landmarks.landmark, label)
+                manos.identificar_letra_mano(dedos, landmarks.landmark)
+        return res
+
+class EtapaFuego:
+    """Mismo chequeo HSV por zonas que SistemaSeguridad.procesar_zonas_fuego"""
+    def __init__(self, args):
+        pass
+
+    def __call__(self, frame):
+        ancho = frame.shape[1]
+        tercio = ancho // 3
+        zonas = [frame[:, 0:tercio], frame[:, tercio:2*tercio], frame[:, 2*tercio:]]
+        estados = []
+        for roi in zonas:
+            hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
+            mask = cv2.inRange(hsv, np.array([18, 50, 50]), np.array([35, 255, 255]))
+            estados.append(cv2.countNonZero(mask) > 2000)
+        return estados
+
+class EtapaFuegoGrilla:
+    """Motor vectorizado de fuego.py (para comparar contra EtapaFuego)"""
+    def __init__(self, args):
+        self.detector = DetectorFuego(1, 3)
+
+    def __call__(self, frame):
+        return self.detector.detectar(frame)
+
+FABRICAS = {"tarjetas": EtapaTarjetas, "manos": EtapaManos, "fuego": EtapaFuego,
+            "fuego_grilla": EtapaFuegoGrilla}
+
+# --- MEDICIÓN ---
+def resumir(tiempos):
+    ms = np.asarray(tiempos) * 1000.0
+    total = float(np.sum(ms))
+    return {
+        "n": int(ms.size),
+        "media_ms": round(float(np.mean(ms)), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(np.max(ms)), 3),
+        "fps": round(ms.size * 1000.0 / total, 2) if total > 0 else None,
+    }
+
+def medir_latencias(etapa, frames, repeticiones, calentamiento):
+    for frame in frames[:calentamiento]:
+        etapa(frame)
+    tiempos = []
+    for _ in range(repeticiones):
+        for frame in frames:
+            t0 = time.perf_counter()
+            etapa(frame)
+            tiempos.append(time.perf_counter() - t0)
+    return tiempos
+
+def medir_asignaciones(etapa, frames):
+    """Pico de memoria transitoria por llamada (pasada aparte: tracemalloc frena)"""
+    picos = []
+    tracemalloc.start()
+    for frame in frames:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        etapa(frame)
+        _, pico = tracemalloc.get_traced_memory()
+        picos.append(pico - base)
+    tracemalloc.stop()
+    return {
+        "pico_transitorio_p50_bytes": int(np.percentile(picos, 50)),
+        "pico_transitorio_max_bytes": int(np.max(picos)),
+    }
+
+def rss_pico_mb():
+    if resource is None: return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return round(maxrss / (1024 * 1024 if platform.system() == 'Darwin' else 1024), 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las rutas críticas de PiArchitect")
+    parser.add_argument("entrada", help="Video o directorio de imágenes (.jpg/.png)")
+    parser.add_argument("--etapas", default=",".join(ETAPAS), help="Lista separada por comas")
+    parser.add_argument("--modelo", default=MODELO_FILE)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--calentamiento", type=int, default=5)
+    parser.add_argument("--max-frames", type=int, default=300)
+    parser.add_argument("--ancho", type=int, default=640)
+    parser.add_argument("--alto", type=int, default=480)
+    parser.add_argument("--sin-memoria", action="store_true", help="Omitir la pasada con tracemalloc")
+    parser.add_argument("--salida", help="Archivo JSON (por defecto stdout)")
+    args = parser.parse_args()
+
+    frames = cargar_frames(args.entrada, args.ancho, args.alto, args.max_frames)
+    if not frames:
+        raise SystemExit(f"⚠️ No se pudieron leer frames de {args.entrada}")
+
+    reporte = {
+        "plataforma": f"{platform.system()} {platform.machine()}",
+        "python": platform.python_version(),
+        "entrada": args.entrada,
+        "frames": len(frames),
+        "resolucion": [args.ancho, args.alto],
+        "etapas": {},
+    }
+
+    for nombre in args.etapas.split(","):
+        etapa = FABRICAS[nombre](args)
+        resultado = resumir(medir_latencias(etapa, frames, args.repeticiones, args.calentamiento))
+        if not args.sin_memoria:
+            resultado.update(medir_asignaciones(etapa, frames))
+        if hasattr(etapa, "backend"):
+            resultado["backend"] = etapa.backend
+        if getattr(etapa, "latencia_fria", None) is not None:
+            resultado["primera_inferencia_ms"] = round(etapa.latencia_fria * 1000, 2)
+        reporte["etapas"][nombre] = resultado
+
+    reporte["rss_pico_mb"] = rss_pico_mb()
+
+    texto = json.dumps(reporte, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    print(texto)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import cv2
+import numpy as np
+import platform
+import threading
+import time
+
+class CapturaCamara:
+    """
+    Lector de cámara en hilo dedicado.
+    Guarda los frames en un anillo de buffers preasignados y solo expone el
+    más reciente (los frames que el bucle no alcanza a consumir se descartan).
+    """
+    def __init__(self, indice=0, ancho=640, alto=480, num_buffers=3):
+        self.indice = indice
+        self.ancho = ancho
+        self.alto = alto
+
+        if platform.system() == 'Windows':
+            self.cap = cv2.VideoCapture(indice, cv2.CAP_DSHOW)
+        else:
+            self.cap = cv2.VideoCapture(indice)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, ancho)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, alto)
+        # Pedir al driver el mínimo de frames encolados (no todos los backends lo respetan)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        # Anillo de buffers (mínimo 3: uno publicado, uno escribiéndose, uno libre)
+        self.num_buffers = max(3, num_buffers)
+        self.buffers = [np.empty((alto, ancho, 3), dtype=np.uint8) for _ in range(self.num_buffers)]
+        self.tiempos = [0.0] * self.num_buffers
+        self.salida = np.empty((alto, ancho, 3), dtype=np.uint8)
+
+        # Estado compartido (protegido por la condición)
+        self.cond = threading.Condition()
+        self.idx_publicado = -1
+        self.frame_id = 0
+        self.ultimo_id_leido = 0
+        self.descartados = 0
+        self.activo = self.cap.isOpened()
+        self.running = True
+
+        self.hilo = threading.Thread(target=self._worker_captura, daemon=True)
+        self.hilo.start()
+
+    def _worker_captura(self):
+        """Hilo lector: escribe en el siguiente slot libre y lo publica"""
+        idx = 0
+        while self.running:
+            buf = self.buffers[idx]
+            ret, frame = self.cap.read(buf)
+            t_captura = time.time()
+
+            if not ret:
+                with self.cond:
+                    self.activo = False
+                    self.cond.notify_all()
+                break
+
+            # Si el driver entrega otra resolución, se adapta el slot
+            if frame is not buf:
+                if frame.shape != buf.shape:
+                    self.buffers[idx] = buf = np.empty_like(frame)
+                np.copyto(buf, frame)
+
+            with self.cond:
+                if self.frame_id > self.ultimo_id_leido:
+                    self.descartados += 1
+                self.tiempos[idx] = t_captura
+                self.idx_publicado = idx
+                self.frame_id += 1
+                self.cond.notify_all()
+
+            # El próximo slot nunca es el publicado, así que no pisa al lector
+            idx = (idx + 1) % self.num_buffers
+
+        # Despierta a un lector bloqueado en leer() tras release()
+        with self.cond:
+            self.activo = False
+            self.cond.notify_all()
+        print("🛑 [CAPTURA] Hilo detenido.")
+
+    def leer(self, timeout=1.0):
+        """
+        Retorna (ok, frame, t_captura) con el frame más reciente no leído.
+        El frame es un buffer reutilizado: copiarlo si se necesita conservarlo.
+        Bloquea como cap.read(): ok=False solo cuando la cámara se detuvo.
+        timeout es el intervalo para avisar de una cámara trabada, no un límite.
+        """
+        with self.cond:
+            esperado = 0.0
+            while not self.cond.wait_for(
+                lambda: self.frame_id > self.ultimo_id_leido or not self.activo,
+                timeout=timeout
+            ):
+                # Un primer frame lento (DSHOW) o un corte USB breve no terminan el bucle
+                esperado += timeout
+                print(f"⚠️ [CAPTURA] Sin frames nuevos hace {esperado:.1f} s")
+            if self.frame_id == self.ultimo_id_leido:
+                return False, None, 0.0
+
+            idx = self.idx_publicado
+            if self.salida.shape != self.buffers[idx].shape:
+                self.salida = np.empty_like(self.buffers[idx])
+            np.copyto(self.salida, self.buffers[idx])
+            self.ultimo_id_leido = self.frame_id
+            return True, self.salida, self.tiempos[idx]
+
+    def read(self):
+        """Compatibilidad con la interfaz de cv2.VideoCapture"""
+        ok, frame, _ = self.leer()
+        return ok, frame
+
+    def release(self):
+        self.running = False
+        if self.hilo.is_alive():
+            self.hilo.join(timeout=1)
+        self.cap.release()
@@ -1,69 +1,295 @@
-import serial
+import collections
+import json
 import threading
 import queue
 import time
 import platform
 
+import protocolo
+import transporte as transportes
+
+# --- CLASES DE COMANDO ---
+# opcode -> (clase, prioridad, debounce en s). Menor prioridad sale antes.
+CLASES_COMANDO = {
+    protocolo.OP_FUEGO:        ("FUEGO", 0, 0.2),
+    protocolo.OP_MODO_AUTO:    ("MODO", 1, 1.0),
+    protocolo.OP_MODO_MANUAL:  ("MODO", 1, 1.0),
+    protocolo.OP_NUMERO:       ("BOMBA", 2, 1.5),
+    protocolo.OP_PUNO_CERRADO: ("BOMBA", 2, 1.5),
+    protocolo.OP_LETRA:        ("LETRA", 2, 1.5),
+}
+
+def clave_comando(op, arg):
+    """Comandos con la misma clave se reemplazan entre sí (el último gana)"""
+    clase = CLASES_COMANDO[op][0]
+    if clase == "FUEGO":
+        return (clase, arg & 0x7F)  # Cada zona por separado
+    if clase == "LETRA":
+        return (clase, "PUERTA" if chr(arg) in "LO" else chr(arg))
+    return (clase,)
+
+class ColaPrioridad:
+    """
+    Cola de comandos pendientes con a lo sumo uno por clave.
+    Un comando nuevo con una clave ya pendiente reemplaza al viejo y conserva
+    su lugar en la cola; get() entrega primero la menor prioridad y, a igual
+    prioridad, el que entró antes, junto con su orden de llegada (el del
+    comando vigente, que ordena la ejecución dentro de la trama).
+    """
+    def __init__(self):
+        self.pendientes = {}  # clave -> [prioridad, orden, llegada, comando]
+        self.orden = 0
+        self.condicion = threading.Condition()
+
+    def put(self, clave, prioridad, comando):
+        """Retorna True si reemplazó un comando pendiente"""
+        with self.condicion:
+            if clave in self.pendientes:
+                self.pendientes[clave][2:] = [self.orden, comando]
+                self.orden += 1
+                return True
+            self.pendientes[clave] = [prioridad, self.orden, self.orden, comando]
+            self.orden += 1
+            self.condicion.notify()
+            return False
+
+    def get(self, timeout=None):
+        """(orden de llegada, comando) del más prioritario"""
+        with self.condicion:
+            if not self.pendientes and not self.condicion.wait_for(lambda: self.pendientes, timeout):
+                raise queue.Empty
+            clave = min(self.pendientes, key=lambda k: self.pendientes[k][:2])
+            return tuple(self.pendientes.pop(clave)[2:])
+
+    def qsize(self):
+        return len(self.pendientes)
+
+    def contiene(self, clave):
+        with self.condicion:
+            return clave in self.pendientes
+
 class GestorSerial:
-    def __init__(self, baudrate=115200):
+    def __init__(self, baudrate=115200, registro=None, reloj=time.time, ventana_lote=0.005,
+                 timeout_ack=0.25, max_reintentos=2, transporte=None, puerto=None):
         self.sistema = platform.system()
-        self.puerto = 'COM3' if self.sistema == 'Windows' else '/dev/serial0'
+        self.puerto = puerto or ('COM3' if self.sistema == 'Windows' else '/dev/serial0')
         self.baudrate = baudrate
-        
-        # Cola de mensajes (Thread-safe)
-        self.cola = queue.Queue()
+        # Reloj inyectable: en replay se usa el tiempo de captura del frame
+        self.reloj = reloj
+        # Comandos que llegan dentro de esta ventana salen en una sola escritura
+        self.ventana_lote = ventana_lote
+        # Registro opcional de comandos (JSON por línea) para comparar corridas
+        self.registro = open(registro, "w", encoding="utf-8") if registro else None
+
+        # Cola de mensajes por prioridad (Thread-safe)
+        self.cola = ColaPrioridad()
         self.running = True
-        
-        # Variables para Debounce (Anti-spam)
-        self.ultimo_comando = ""
-        self.tiempo_ultimo = 0
-        
-        # Iniciar el hilo cartero
+        # Transporte inyectable (pty, TCP, memoria; ver transporte.py). Sin él se abre el puerto serie
+        self.ser = transporte
+
+        # Debounce (Anti-spam) por clave: clave -> (último comando, tiempo)
+        self.ultimos = {}
+        self.reemplazados = 0
+
+        # Confirmaciones: una trama en vuelo a la vez, la siguiente sale con su ACK.
+        # Así la Pico ejecuta en orden (un reintento atrasado nunca pisa una trama
+        # más nueva) y lo que llega mientras tanto se coalesce en la cola
+        self.timeout_ack = timeout_ack
+        self.max_reintentos = max_reintentos
+        self.seq = 0
+        self.pendientes = {}  # seq -> [t_envio, trama, intentos, comandos]
+        self.lock = threading.Lock()
+        self.respuesta = threading.Event()  # ACK/NACK recibido: el cartero no espera el timeout
+        self.rtts = collections.deque(maxlen=200)          # Ida y vuelta (s)
+        self.duraciones = collections.deque(maxlen=200)    # Ejecución en la Pico (us)
+        self.contadores = {"enviadas": 0, "confirmadas": 0, "reintentos": 0, "perdidas": 0,
+                           "obsoletas": 0, "rechazadas": 0, "nacks": 0, "errores_crc": 0,
+                           "malformadas": 0, "descartadas": 0}
+        self.profundidad_max = 0
+
+        # Iniciar el hilo cartero (el lector arranca si se abre el puerto)
         self.hilo = threading.Thread(target=self._worker_serial, daemon=True)
+        self.hilo_lector = None
         self.hilo.start()
 
     def _worker_serial(self):
         """Proceso en segundo plano que gestiona el hardware"""
-        ser = None
         try:
-            # Timeout 1s para no bloquear
-            ser = serial.Serial(self.puerto, self.baudrate, timeout=1)
-            print(f"✅ [COMUNICACION] Puerto {self.puerto} abierto.")
+            if self.ser is None:
+                # Timeout 1s para no bloquear
+                self.ser = transportes.abrir_serial(self.puerto, self.baudrate, timeout=1)
+            print(f"✅ [COMUNICACION] Puerto {getattr(self.ser, 'nombre', self.puerto)} abierto.")
+            self.hilo_lector = threading.Thread(target=self._worker_lector, daemon=True)
+            self.hilo_lector.start()
         except Exception as e:
-            print(f"⚠️ [COMUNICACION] Error puerto ({e}). Modo Simulación.")
+            print(f"⚠️ [COMUNICACION] Error puerto ({e}). Modo Simulación: los comandos se descartan.")
 
         while self.running:
+            if self.pendientes:
+                # Trama en vuelo: esperar su ACK (o el timeout para reenviarla)
+                self.respuesta.wait(self.timeout_ack / 2)
+                self.respuesta.clear()
+                self._revisar_pendientes()
+                continue
             try:
-                # Esperar mensaje (bloqueante con timeout para permitir salir)
-                comando = self.cola.get(timeout=1)
-                
-                if ser and ser.is_open:
-                    msg = f"{comando}\n"
-                    ser.write(msg.encode('utf-8'))
-                elif self.sistema == 'Windows':
-                    # Feedback visual solo en Windows si no hay serial
-                    pass 
-                
-                self.cola.task_done()
+                lote = [self.cola.get(timeout=1)]
+                # Juntar lo que llegue durante la ventana de agrupado
+                limite = time.monotonic() + self.ventana_lote
+                while len(lote) < protocolo.MAX_COMANDOS:
+                    restante = limite - time.monotonic()
+                    if restante <= 0: break
+                    try:
+                        lote.append(self.cola.get(timeout=restante))
+                    except queue.Empty:
+                        break
+
+                # La prioridad elige qué entra en la trama; dentro de ella se
+                # respeta el orden de llegada (MODO_*, NUMERO y PUÑO apagan todas
+                # las bombas: no pueden ejecutarse después de un FUEGO_ON posterior)
+                lote = [comando for _, comando in sorted(lote)]
+                if self.ser and self.ser.is_open:
+                    self._escribir_lote(lote)
+                else:
+                    # Modo Simulación: se cuentan para que no desaparezcan en silencio
+                    self.contadores["descartadas"] += len(lote)
             except queue.Empty:
-                continue
+                pass
             except Exception as e:
                 print(f"Error enviando: {e}")
 
-        if ser: ser.close()
+        if self.ser: self.ser.close()
         print("🛑 [COMUNICACION] Hilo detenido.")
 
+    def _escribir_lote(self, lote):
+        seq = self.seq
+        self.seq = (self.seq + 1) % protocolo.SEQ_DESCONOCIDO
+        trama = protocolo.empaquetar(lote, seq)
+        with self.lock:
+            self.pendientes[seq] = [time.monotonic(), trama, 1, lote]
+        self.ser.write(trama)
+        self.contadores["enviadas"] += 1
+
+    def _revisar_pendientes(self):
+        """
+        Reenvía las tramas sin ACK dentro de timeout_ack; descarta tras max_reintentos.
+        Un comando con otro más nuevo de la misma clave ya en la cola no se reenvía:
+        sale el nuevo apenas llegue el ACK.
+        """
+        ahora = time.monotonic()
+        reenviar = []
+        with self.lock:
+            for seq, pendiente in list(self.pendientes.items()):
+                t_envio, trama, intentos, comandos = pendiente
+                if ahora - t_envio < self.timeout_ack: continue
+                vigentes = [c for c in comandos if not self.cola.contiene(clave_comando(*c))]
+                if not vigentes:
+                    del self.pendientes[seq]
+                    self.contadores["obsoletas"] += 1
+                elif intentos > self.max_reintentos:
+                    del self.pendientes[seq]
+                    self.contadores["perdidas"] += 1
+                    print(f"⚠️ [UART] Trama {seq} sin confirmar tras {intentos} intentos")
+                else:
+                    if len(vigentes) < len(comandos):
+                        # Mismo SEQ: si la Pico ya ejecutó la original, solo repite el ACK
+                        pendiente[1] = trama = protocolo.empaquetar(vigentes, seq)
+                        pendiente[3] = vigentes
+                    pendiente[0] = ahora
+                    pendiente[2] += 1
+                    reenviar.append(trama)
+        for trama in reenviar:
+            self.ser.write(trama)
+            self.contadores["reintentos"] += 1
+
+    def _worker_lector(self):
+        """Lee ACK/NACK de la Pico y mide el tiempo de ida y vuelta"""
+        lector = protocolo.LectorTramas()
+        while self.running and self.ser and self.ser.is_open:
+            try:
+                datos = self.ser.read(self.ser.in_waiting or 1)
+            except Exception as e:
+                print(f"⚠️ [COMUNICACION] Error leyendo: {e}")
+                break
+            for payload in lector.alimentar(datos):
+                try:
+                    tipo, seq, info = protocolo.decodificar_payload(payload)
+                except protocolo.TramaInvalida:
+                    self.contadores["malformadas"] += 1
+                    continue
+                if tipo == protocolo.TIPO_ACK:
+                    self._confirmar(seq, info[1])
+                elif tipo == protocolo.TIPO_NACK:
+                    self._rechazar(seq, info)
+            self.contadores["errores_crc"] = lector.errores_crc
+
+    def _confirmar(self, seq, duracion_us):
+        with self.lock:
+            pendiente = self.pendientes.pop(seq, None)
+        if pendiente is None: return  # ACK de un reintento ya confirmado
+        self.respuesta.set()
+        self.rtts.append(time.monotonic() - pendiente[0])
+        self.duraciones.append(duracion_us)
+        self.contadores["confirmadas"] += 1
+
+    def _rechazar(self, seq, codigo):
+        self.contadores["nacks"] += 1
+        with self.lock:
+            if codigo in (protocolo.ERROR_CRC, protocolo.ERROR_FORMATO):
+                # La Pico no pudo leer la trama: reenviar todo lo pendiente ya mismo
+                for pendiente in self.pendientes.values():
+                    pendiente[0] = 0.0
+            else:
+                # Un opcode que la Pico no conoce no se arregla reenviando
+                if self.pendientes.pop(seq, None) is not None:
+                    self.contadores["rechazadas"] += 1
+                print(f"⚠️ [UART] La Pico rechazó la trama {seq} (código {codigo})")
+        self.respuesta.set()
+
+    def estadisticas(self):
+        """Latencias de ida y vuelta (ms), ejecución en la Pico (us) y contadores"""
+        rtts = sorted(self.rtts)
+        resumen = dict(self.contadores, pendientes=len(self.pendientes), reemplazados=self.reemplazados,
+                       profundidad_max=self.profundidad_max)
+        if rtts:
+            resumen.update(
+                rtt_p50_ms=round(rtts[len(rtts) // 2] * 1000, 2),
+                rtt_p95_ms=round(rtts[min(len(rtts) - 1, int(len(rtts) * 0.95))] * 1000, 2),
+                rtt_max_ms=round(rtts[-1] * 1000, 2),
+                ejecucion_media_us=round(sum(self.duraciones) / len(self.duraciones), 1),
+            )
+        return resumen
+
     def enviar(self, comando):
         """Método público para encolar comandos con filtro de tiempo"""
-        ahora = time.time()
-        # Debounce de 1.5 segundos
-        if comando != self.ultimo_comando or (ahora - self.tiempo_ultimo > 1.5):
-            print(f"📤 [UART] Enviando: '{comando}'")
-            self.cola.put(comando)
-            self.ultimo_comando = comando
-            self.tiempo_ultimo = ahora
+        ahora = self.reloj()
+        try:
+            op, arg = protocolo.codificar_comando(comando)
+        except ValueError as e:
+            print(f"⚠️ [UART] {e}")
+            return
+        clave = clave_comando(op, arg)
+        _, prioridad, debounce = CLASES_COMANDO[op]
+
+        # Debounce por clave: repetir el mismo comando dentro de la ventana no sale
+        ultimo, tiempo = self.ultimos.get(clave, ("", 0))
+        if comando == ultimo and ahora - tiempo <= debounce:
+            return
+
+        print(f"📤 [UART] Enviando: '{comando}'")
+        if self.cola.put(clave, prioridad, (op, arg)):
+            self.reemplazados += 1
+        self.profundidad_max = max(self.profundidad_max, self.cola.qsize())
+        if self.registro:
+            self.registro.write(json.dumps({"t": ahora, "cmd": comando}, ensure_ascii=False) + "\n")
+        self.ultimos[clave] = (comando, ahora)
 
     def cerrar(self):
         self.running = False
         if self.hilo.is_alive():
-            self.hilo.join(timeout=1)
\ No newline at end of file
+            self.hilo.join(timeout=1)
+        if self.hilo_lector and self.hilo_lector.is_alive():
+            self.hilo_lector.join(timeout=1.5)
+        if self.contadores["enviadas"] or self.contadores["descartadas"]:
+            print(f"📊 [UART] {self.estadisticas()}")
+        if self.registro:
+            self.registro.close()
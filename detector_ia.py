@@ -1,64 +1,408 @@
 import cv2
 import numpy as np
+import os
 import platform
+import threading
+import time
+
+from planificador import MedidorMovimiento
+
+# Resultado compacto de detectar(): una fila por tarjeta
+DTYPE_DETECCION = np.dtype([('caja', np.float32, (4,)), ('clase', np.int32), ('score', np.float32)])
+
+# Normalización con la que se entrenó el modelo: real = (pixel - MEDIA) / ESCALA
+MEDIA_ENTRADA = 127.5
+ESCALA_ENTRADA = 127.5
+
+def nms_por_clase(cajas, clases, umbral_iou, max_detecciones):
+    """
+    NMS voraz separado por clase. Las cajas deben venir ordenadas por score
+    descendente. Retorna los índices conservados.
+    """
+    # Desplazar cada clase a su propia región: cajas de clases distintas nunca se solapan
+    desplazadas = cajas + (clases.astype(np.float32) * 2.0)[:, None]
+    ymin, xmin, ymax, xmax = desplazadas.T
+    areas = np.clip(ymax - ymin, 0, None) * np.clip(xmax - xmin, 0, None)
+
+    pendientes = np.arange(len(cajas))
+    conservados = []
+    while pendientes.size and len(conservados) < max_detecciones:
+        i = pendientes[0]
+        conservados.append(i)
+        resto = pendientes[1:]
+
+        alto = np.clip(np.minimum(ymax[i], ymax[resto]) - np.maximum(ymin[i], ymin[resto]), 0, None)
+        ancho = np.clip(np.minimum(xmax[i], xmax[resto]) - np.maximum(xmin[i], xmin[resto]), 0, None)
+        inter = alto * ancho
+        iou = inter / (areas[i] + areas[resto] - inter + 1e-9)
+        pendientes = resto[iou <= umbral_iou]
+
+    return np.array(conservados, dtype=np.intp)
+
+class ConfigMotor:
+    """
+    Configuración del intérprete TFLite.
+    delegado: 'xnnpack' (CPU optimizado, incluido en el runtime), 'ninguno'
+              (kernels de referencia) o ruta a la librería de un delegado externo.
+    preferir_int8: usar la variante cuantizada del modelo si existe en disco.
+    """
+    def __init__(self, num_hilos=None, delegado='xnnpack', opciones_delegado=None,
+                 preferir_int8=False, modelo_int8_path=None):
+        self.num_hilos = num_hilos or os.cpu_count() or 1
+        self.delegado = delegado
+        self.opciones_delegado = opciones_delegado or {}
+        self.preferir_int8 = preferir_int8
+        self.modelo_int8_path = modelo_int8_path
+
+    @classmethod
+    def desde_entorno(cls):
+        """Permite ajustar el motor en cada equipo sin tocar el código"""
+        hilos = os.environ.get("PIARCH_HILOS")
+        return cls(
+            num_hilos=int(hilos) if hilos else None,
+            delegado=os.environ.get("PIARCH_DELEGADO", "xnnpack"),
+            preferir_int8=os.environ.get("PIARCH_INT8", "0") == "1",
+        )
 
 class DetectorRoboflow:
-    def __init__(self, modelo_path, etiquetas, umbral=0.6):
-        self.modelo_path = modelo_path
+    def __init__(self, modelo_path, etiquetas, umbral=0.6, umbrales_clase=None,
+                 iou_nms=0.5, max_detecciones=5, config=None):
+        self.config = config or ConfigMotor.desde_entorno()
+        self.modelo_path = self._elegir_modelo(modelo_path)
         self.etiquetas = etiquetas
         self.umbral = umbral
+        self.iou_nms = iou_nms
+        self.max_detecciones = max_detecciones
+
+        # Umbral por clase (dict etiqueta -> umbral); el resto usa el global
+        umbrales_clase = umbrales_clase or {}
+        self.umbrales = np.array([umbrales_clase.get(e, umbral) for e in etiquetas], dtype=np.float32)
         self.interpreter = None
+        self.backend = "sin motor"
         self.input_shape = (320, 320) # Default por seguridad
+        self.tam_lote = 1
+        self.lote_nativo = False
+        self.turno = 0
+        # Listo para inferir sin la demora de la primera invocación (ver calentar)
+        self.listo = threading.Event()
+        self.latencia_fria = None
+        self.latencia_caliente = None
 
         self._cargar_motor()
 
+    def _elegir_modelo(self, modelo_path):
+        """Variante int8 (modelo_int8.tflite por defecto) si se pidió y existe"""
+        if not self.config.preferir_int8:
+            return modelo_path
+        ruta_int8 = self.config.modelo_int8_path or modelo_path.replace(".tflite", "_int8.tflite")
+        if os.path.exists(ruta_int8):
+            return ruta_int8
+        print(f"⚠️ [IA] Modelo int8 no encontrado ({ruta_int8}). Usando {modelo_path}")
+        return modelo_path
+
     def _cargar_motor(self):
         sistema = platform.system()
         try:
             if sistema == 'Windows':
                 import tensorflow as tf
                 Interpreter = tf.lite.Interpreter
+                load_delegate = tf.lite.experimental.load_delegate
+                OpResolverType = getattr(tf.lite.experimental, 'OpResolverType', None)
             else:
-                from tflite_runtime.interpreter import Interpreter
-            
-            self.interpreter = Interpreter(model_path=self.modelo_path)
+                import tflite_runtime.interpreter as tflite
+                Interpreter = tflite.Interpreter
+                load_delegate = tflite.load_delegate
+                OpResolverType = getattr(tflite, 'OpResolverType', None)
+
+            cfg = self.config
+            kwargs = {'model_path': self.modelo_path, 'num_threads': cfg.num_hilos}
+            delegado = None  # Nombre del delegado pedido, para verificar si se aplicó
+
+            if cfg.delegado == 'xnnpack':
+                # XNNPACK es el delegado por defecto del resolver BUILTIN
+                delegado = "XNNPACK"
+            elif cfg.delegado == 'ninguno':
+                if OpResolverType is not None:
+                    kwargs['experimental_op_resolver_type'] = OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+            elif cfg.delegado:
+                try:
+                    kwargs['experimental_delegates'] = [load_delegate(cfg.delegado, cfg.opciones_delegado)]
+                    delegado = f"Delegado {os.path.basename(cfg.delegado)}"
+                except Exception as e:
+                    print(f"⚠️ [IA] Delegado '{cfg.delegado}' no disponible ({e}). Usando CPU.")
+
+            try:
+                self.interpreter = Interpreter(**kwargs)
+            except Exception as e:
+                if 'experimental_delegates' not in kwargs: raise
+                # El delegado cargó pero no acepta el grafo: reintentar sin él
+                print(f"⚠️ [IA] El delegado rechazó el modelo ({e}). Usando CPU.")
+                del kwargs['experimental_delegates']
+                delegado = None
+                self.interpreter = Interpreter(**kwargs)
+
+            # Los delegados por defecto (XNNPACK) se aplican recién al reservar tensores
             self.interpreter.allocate_tensors()
+            self.backend = self._describir_backend(delegado)
             self.input_details = self.interpreter.get_input_details()
             self.output_details = self.interpreter.get_output_details()
             self.input_shape = self.input_details[0]['shape']
-            print(f"🧠 [IA] Modelo cargado. Input: {self.input_shape}")
+            self._preparar_buffers()
+            print(f"🧠 [IA] Modelo cargado ({os.path.basename(self.modelo_path)}). "
+                  f"Input: {self.input_shape} {self.input_details[0]['dtype'].__name__}. Backend: {self.backend}")
             
         except ImportError:
             print("⚠️ [IA] Librerías TensorFlow no encontradas.")
         except Exception as e:
             print(f"⚠️ [IA] Error cargando modelo: {e}")
 
-    def detectar(self, frame_rgb):
-        """Retorna lista de tuplas: (caja, nombre, score)"""
-        if not self.interpreter: return []
+    def _delegado_aplicado(self):
+        """
+        True si algún nodo del grafo quedó en manos de un delegado, False si no,
+        None si el runtime no permite saberlo. Los nodos delegados aparecen como
+        'DELEGATE' en la lista de operaciones (API privada del intérprete).
+        """
+        try:
+            return any(op['op_name'] == 'DELEGATE' for op in self.interpreter._get_ops_details())
+        except Exception:
+            return None
 
-        # Preprocesamiento
+    def _describir_backend(self, delegado):
+        """Backend realmente en uso, no solo el pedido en la configuración"""
+        cpu = f"CPU ({self.config.num_hilos} hilos)"
+        if delegado is None:
+            return cpu
+        aplicado = self._delegado_aplicado()
+        if aplicado:
+            return f"{delegado} ({self.config.num_hilos} hilos)"
+        if aplicado is None:
+            return f"{cpu}, {delegado} sin verificar"
+        print(f"⚠️ [IA] {delegado} no tomó ningún nodo del modelo. Usando CPU.")
+        return cpu
+
+    def _preparar_buffers(self):
+        """Buffers de preprocesado reservados una sola vez"""
         h, w = self.input_shape[1], self.input_shape[2]
-        img_resized = cv2.resize(frame_rgb, (w, h))
-        input_data = np.expand_dims(img_resized, axis=0)
+        self.indice_entrada = self.input_details[0]['index']
+        self.es_float = self.input_details[0]['dtype'] == np.float32
+        self.es_int8 = self.input_details[0]['dtype'] == np.int8
+        self.buf_resized = np.empty((h, w, 3), dtype=np.uint8)
+        self.buf_rgb = np.empty((h, w, 3), dtype=np.uint8)
+        self.lut_entrada = None if self.es_float else self._tabla_cuantizacion()
+
+    def _tabla_cuantizacion(self):
+        """
+        Tabla pixel (0-255) -> valor cuantizado, con la escala y el punto cero
+        del propio modelo: q = real / escala + punto_cero. Retorna None si la
+        tabla es la identidad (el pixel ya es el valor cuantizado).
+        """
+        escala, punto_cero = self.input_details[0]['quantization']
+        tipo = self.input_details[0]['dtype']
+        pixeles = np.arange(256, dtype=np.float64)
+        if escala:
+            real = (pixeles - MEDIA_ENTRADA) / ESCALA_ENTRADA
+            cuantizado = np.round(real / escala + punto_cero)
+        elif self.es_int8:
+            cuantizado = pixeles - 128  # int8 sin parámetros: pixel desplazado al rango con signo
+        else:
+            return None  # uint8 sin parámetros: el modelo espera el pixel crudo
+        info = np.iinfo(tipo)
+        tabla = np.clip(cuantizado, info.min, info.max).astype(tipo).view(np.uint8)
+        if np.array_equal(tabla, pixeles.astype(np.uint8)):
+            return None
+        return tabla
+
+    def _preprocesar(self, frame, es_bgr, posicion=0):
+        """Redimensiona y normaliza directamente sobre el tensor de entrada"""
+        h, w = self.input_shape[1], self.input_shape[2]
+        # Vista sobre la memoria del intérprete: debe soltarse antes de invoke()
+        entrada = self.interpreter.tensor(self.indice_entrada)()[posicion]
+
+        if self.es_int8:
+            # Se escribe en bytes; la tabla deja el complemento a dos correcto
+            entrada = entrada.view(np.uint8)
+
+        if not self.es_float:
+            if es_bgr:
+                # Convertir después de reducir: cvtColor trabaja sobre la imagen pequeña
+                cv2.resize(frame, (w, h), dst=self.buf_resized)
+                cv2.cvtColor(self.buf_resized, cv2.COLOR_BGR2RGB, dst=entrada)
+            else:
+                cv2.resize(frame, (w, h), dst=entrada)
+            if self.lut_entrada is not None:
+                cv2.LUT(entrada, self.lut_entrada, dst=entrada)
+            return
+
+        cv2.resize(frame, (w, h), dst=self.buf_resized)
+        origen = self.buf_resized
+        if es_bgr:
+            cv2.cvtColor(self.buf_resized, cv2.COLOR_BGR2RGB, dst=self.buf_rgb)
+            origen = self.buf_rgb
+        # (x - MEDIA) / ESCALA sin temporales intermedios
+        np.subtract(origen, np.float32(MEDIA_ENTRADA), out=entrada, dtype=np.float32)
+        np.multiply(entrada, np.float32(1 / ESCALA_ENTRADA), out=entrada)
 
-        if self.input_details[0]['dtype'] == np.float32:
-            input_data = (np.float32(input_data) - 127.5) / 127.5
+    def detectar(self, frame, es_bgr=False):
+        """
+        Retorna un array estructurado DTYPE_DETECCION (caja, clase, score),
+        ordenado por score. El nombre es self.etiquetas[clase].
+        frame: RGB por defecto; con es_bgr=True acepta el frame BGR de la cámara.
+        """
+        if not self.interpreter: return np.empty(0, dtype=DTYPE_DETECCION)
+
+        # Preprocesamiento
+        self._preprocesar(frame, es_bgr)
 
         # Inferencia
-        self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
         self.interpreter.invoke()
 
-        # Resultados
-        boxes = self.interpreter.get_tensor(self.output_details[0]['index'])[0]
-        classes = self.interpreter.get_tensor(self.output_details[1]['index'])[0]
-        scores = self.interpreter.get_tensor(self.output_details[2]['index'])[0]
-
-        resultados = []
-        for i in range(len(scores)):
-            if scores[i] > self.umbral:
-                idx = int(classes[i])
-                if idx < len(self.etiquetas):
-                    resultados.append((boxes[i], self.etiquetas[idx], scores[i]))
-        
-        return resultados
\ No newline at end of file
+        return self._leer_salida(0)
+
+    def calentar(self, ancho=640, alto=480, repeticiones=3):
+        """
+        Corre frames sintéticos del tamaño de la cámara por el preprocesado y el
+        modelo para pagar la reserva de memoria y la selección de kernels antes
+        del primer frame real. Registra la latencia fría y la caliente (mediana)
+        y marca self.listo.
+        """
+        if not self.interpreter:
+            self.listo.set()  # Sin motor detectar() responde vacío al instante
+            return
+        frame = np.random.default_rng(0).integers(0, 256, (alto, ancho, 3), dtype=np.uint8)
+        tiempos = []
+        for _ in range(1 + repeticiones):
+            t0 = time.perf_counter()
+            for i in range(self.tam_lote):
+                self._preprocesar(frame, True, i)
+            self.interpreter.invoke()
+            self._leer_salida(0)
+            tiempos.append(time.perf_counter() - t0)
+
+        self.latencia_fria = tiempos[0]
+        self.latencia_caliente = float(np.median(tiempos[1:])) if repeticiones else tiempos[0]
+        self.listo.set()
+        print(f"🔥 [IA] Calentamiento: frío {self.latencia_fria * 1000:.1f} ms, "
+              f"caliente {self.latencia_caliente * 1000:.1f} ms")
+
+    def configurar_lote(self, n):
+        """
+        Intenta redimensionar la entrada a un lote de n imágenes.
+        Si el modelo no lo soporta (p.ej. SSD con post-proceso TFLite),
+        vuelve a lote 1 y detectar_lote() alterna las cámaras por turnos.
+        """
+        if not self.interpreter or n <= 1:
+            return False
+        forma = [n, self.input_shape[1], self.input_shape[2], self.input_shape[3]]
+        try:
+            self.interpreter.resize_tensor_input(self.indice_entrada, forma)
+            self.interpreter.allocate_tensors()
+            self.output_details = self.interpreter.get_output_details()
+            if any(d['shape'][0] != n for d in self.output_details[:3]):
+                raise ValueError("las salidas no respetan el lote")
+            self.interpreter.invoke()  # Validar que los kernels aceptan el lote
+            self.tam_lote = n
+            self.lote_nativo = True
+            print(f"🧠 [IA] Lote nativo de {n} imágenes activo.")
+        except Exception as e:
+            print(f"⚠️ [IA] Lote de {n} no soportado ({e}). Modo por turnos.")
+            forma[0] = 1
+            self.interpreter.resize_tensor_input(self.indice_entrada, forma)
+            self.interpreter.allocate_tensors()
+            self.output_details = self.interpreter.get_output_details()
+            self.tam_lote = 1
+            self.lote_nativo = False
+        return self.lote_nativo
+
+    def detectar_lote(self, frames, es_bgr=True):
+        """
+        Detecta sobre varias cámaras. Retorna una lista alineada con frames;
+        en modo por turnos solo se procesa una cámara por llamada y el resto es None.
+        """
+        n = len(frames)
+        if not self.interpreter:
+            return [np.empty(0, dtype=DTYPE_DETECCION) for _ in frames]
+
+        if not self.lote_nativo or n != self.tam_lote:
+            resultados = [None] * n
+            self.turno = (self.turno + 1) % n
+            resultados[self.turno] = self.detectar(frames[self.turno], es_bgr)
+            return resultados
+
+        for i, frame in enumerate(frames):
+            self._preprocesar(frame, es_bgr, i)
+        self.interpreter.invoke()
+        return [self._leer_salida(i) for i in range(n)]
+
+    def _leer_salida(self, posicion):
+        boxes = self.interpreter.get_tensor(self.output_details[0]['index'])[posicion]
+        classes = self.interpreter.get_tensor(self.output_details[1]['index'])[posicion]
+        scores = self.interpreter.get_tensor(self.output_details[2]['index'])[posicion]
+        return self._postprocesar(boxes, classes, scores)
+
+    def _postprocesar(self, boxes, classes, scores):
+        """Filtro por umbral de clase, NMS por clase y top-k, todo vectorizado"""
+        clases = classes.astype(np.int32)
+        validos = (clases >= 0) & (clases < len(self.etiquetas))
+        umbral = self.umbrales[np.clip(clases, 0, len(self.etiquetas) - 1)]
+        candidatos = np.flatnonzero(validos & (scores > umbral))
+        if candidatos.size == 0:
+            return np.empty(0, dtype=DTYPE_DETECCION)
+
+        orden = candidatos[np.argsort(-scores[candidatos], kind='stable')]
+        orden = orden[nms_por_clase(boxes[orden], clases[orden], self.iou_nms, self.max_detecciones)]
+
+        resultados = np.empty(len(orden), dtype=DTYPE_DETECCION)
+        resultados['caja'] = boxes[orden]
+        resultados['clase'] = clases[orden]
+        resultados['score'] = scores[orden]
+        return resultados
+
+class DetectorConCompuerta:
+    """
+    Envuelve un DetectorRoboflow y solo invoca el modelo cuando la escena
+    cambió respecto al frame de la última inferencia (energía de cambio
+    sobre una versión gris reducida) o cuando el resultado guardado tiene
+    más de max_antiguedad segundos. Mientras tanto repite las últimas cajas.
+    """
+    def __init__(self, detector, umbral_cambio=4.0, max_antiguedad=2.0, reloj=time.time):
+        self.detector = detector
+        self.umbral_cambio = umbral_cambio    # Diferencia media (0-255) contra la referencia
+        self.max_antiguedad = max_antiguedad  # Segundos máximos sin volver a inferir
+        self.reloj = reloj
+        self.medidor = MedidorMovimiento()
+        self.ultimas_cajas = None
+        self.t_inferencia = 0.0
+        self.inferencias = 0
+        self.omitidas = 0
+
+    def __getattr__(self, nombre):
+        # etiquetas, backend, etc. son los del detector envuelto
+        return getattr(self.detector, nombre)
+
+    def evaluar(self, frame, es_bgr=False, t_captura=None):
+        """
+        Como detectar, pero retorna (cajas, fresca): fresca es False cuando se
+        repitieron las cajas guardadas sin invocar el modelo. t_captura es el
+        tiempo del frame evaluado (por defecto, el reloj al momento de la llamada).
+        """
+        # En RGB el gris pondera distinto los canales; para medir cambio da igual
+        energia = self.medidor.medir(frame, avanzar=False)
+        ahora = self.reloj() if t_captura is None else t_captura
+        if (self.ultimas_cajas is not None and energia < self.umbral_cambio
+                and ahora - self.t_inferencia < self.max_antiguedad):
+            self.omitidas += 1
+            return self.ultimas_cajas, False
+
+        self.ultimas_cajas = self.detector.detectar(frame, es_bgr)
+        self.medidor.fijar_referencia()
+        self.t_inferencia = ahora
+        self.inferencias += 1
+        return self.ultimas_cajas, True
+
+    def detectar(self, frame, es_bgr=False):
+        """Misma interfaz que DetectorRoboflow.detectar"""
+        return self.evaluar(frame, es_bgr)[0]
+
+    def invalidar(self):
+        """Fuerza una inferencia en la próxima llamada"""
+        self.ultimas_cajas = None
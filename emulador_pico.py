@@ -0,0 +1,194 @@
+import argparse
+import random
+import threading
+import time
+
+import protocolo
+import transporte as transportes
+
+class EmuladorPico:
+    """
+    Emulador en la PC del manejo de comandos de firmware_pico/main.py:
+    mismo protocolo, mismos efectos sobre bombas/servo/LEDs (como estado en
+    memoria) y misma respuesta ACK/NACK. Sirve para pruebas de carga sin la Pico.
+    """
+    def __init__(self, transporte, tiempo_comando=0.0, prob_corrupcion=0.0, semilla=0, verboso=False):
+        self.transporte = transporte
+        self.tiempo_comando = tiempo_comando    # Segundos simulados de ejecución por comando
+        self.prob_corrupcion = prob_corrupcion  # Probabilidad de perder un byte, en ambos sentidos
+        self.azar = random.Random(semilla)
+        self.verboso = verboso
+
+        # Estado de las salidas (igual que en la Pico)
+        self.bombas = [0] * 5
+        self.servo = 0
+        self.led_v = 0
+        self.modo = None
+        self.eventos = []  # (vencimiento, nombre, función) como el planificador del firmware
+
+        self.lector = protocolo.LectorTramas()
+        # Última trama ejecutada (seq, recepción, respuesta), igual que ultima_trama en el firmware
+        self.ultima_trama = (protocolo.SEQ_DESCONOCIDO, 0.0, b"")
+        self.contadores = {"tramas": 0, "comandos": 0, "acks": 0, "nacks": 0, "duplicadas": 0,
+                           "malformadas": 0, "bytes_rx": 0}
+        self.running = True
+        self.t0 = time.monotonic()
+        self.hilo = threading.Thread(target=self._bucle, daemon=True)
+        self.hilo.start()
+
+    # --- Manejadores (mismos nombres y efectos que en el firmware) ---
+    def control_bomba_manual(self, numero):
+        self.bombas = [1 if (i + 1) == numero else 0 for i in range(5)]
+
+    def cmd_modo_auto(self, arg):
+        self.modo = "AUTO"
+        self.control_bomba_manual(0)
+
+    def cmd_modo_manual(self, arg):
+        self.modo = "MANUAL"
+        self.control_bomba_manual(0)
+
+    def cmd_fuego(self, arg):
+        zona = arg & 0x7F
+        if 1 <= zona <= 3:
+            self.bombas[zona - 1] = 1 if arg & protocolo.FUEGO_ON else 0
+
+    def cmd_numero(self, arg):
+        self.control_bomba_manual(arg)
+
+    def cmd_puno(self, arg):
+        self.control_bomba_manual(0)
+
+    def cmd_letra(self, arg):
+        letra = chr(arg)
+        if letra == "L": self.servo = 90
+        elif letra == "O": self.servo = 0
+        elif letra == "V":
+            self.led_v = 1
+            self.eventos.append((time.monotonic() + 0.5, "led_v", lambda: setattr(self, "led_v", 0)))
+
+    MANEJADORES = {
+        protocolo.OP_MODO_AUTO: cmd_modo_auto,
+        protocolo.OP_MODO_MANUAL: cmd_modo_manual,
+        protocolo.OP_FUEGO: cmd_fuego,
+        protocolo.OP_NUMERO: cmd_numero,
+        protocolo.OP_PUNO_CERRADO: cmd_puno,
+        protocolo.OP_LETRA: cmd_letra,
+    }
+
+    VENTANA_DUPLICADO = 2.0  # Segundos (VENTANA_DUPLICADO_MS en el firmware)
+
+    # --- Bucle ---
+    def _corromper(self, datos):
+        if not self.prob_corrupcion or not datos: return datos
+        return bytes(b for b in datos if self.azar.random() >= self.prob_corrupcion)
+
+    def _responder(self, trama):
+        # Un ACK perdido hace que la Pi reenvíe una trama ya ejecutada
+        self.transporte.write(self._corromper(trama))
+
+    def _atender(self, payload):
+        t_recepcion = int((time.monotonic() - self.t0) * 1000)
+        t_inicio = time.perf_counter()
+        try:
+            tipo, seq, comandos = protocolo.decodificar_payload(payload)
+        except protocolo.TramaInvalida:
+            # Igual que el firmware: la Pi reenvía lo pendiente
+            self._responder(protocolo.empaquetar_nack(protocolo.SEQ_DESCONOCIDO, protocolo.ERROR_FORMATO))
+            self.contadores["malformadas"] += 1
+            self.contadores["nacks"] += 1
+            return
+        if tipo != protocolo.TIPO_COMANDOS: return
+
+        ahora = time.monotonic()
+        ultima_seq, ultima_t, respuesta = self.ultima_trama
+        if seq == ultima_seq and ahora - ultima_t < self.VENTANA_DUPLICADO:
+            # Reintento de una trama ya ejecutada: se confirma sin volver a ejecutarla
+            self.ultima_trama = (seq, ahora, respuesta)
+            self._responder(respuesta)
+            self.contadores["duplicadas"] += 1
+            return
+        self.contadores["tramas"] += 1
+
+        desconocido = False
+        for op, arg in comandos:
+            if self.verboso:
+                print(f"📨 [EMULADOR] Cmd: {protocolo.decodificar_comando(op, arg)}")
+            manejador = self.MANEJADORES.get(op)
+            if manejador:
+                manejador(self, arg)
+                self.contadores["comandos"] += 1
+            else:
+                desconocido = True
+            if self.tiempo_comando:
+                time.sleep(self.tiempo_comando)
+
+        if desconocido:
+            respuesta = protocolo.empaquetar_nack(seq, protocolo.ERROR_OPCODE)
+            self.contadores["nacks"] += 1
+        else:
+            duracion_us = int((time.perf_counter() - t_inicio) * 1e6)
+            respuesta = protocolo.empaquetar_ack(seq, t_recepcion, duracion_us)
+            self.contadores["acks"] += 1
+        self.ultima_trama = (seq, ahora, respuesta)
+        self._responder(respuesta)
+
+    def _bucle(self):
+        while self.running and self.transporte.is_open:
+            datos = self._corromper(self.transporte.read(256))
+            self.contadores["bytes_rx"] += len(datos)
+            errores_previos = self.lector.errores_crc
+            for payload in self.lector.alimentar(datos):
+                self._atender(payload)
+            if self.lector.errores_crc != errores_previos:
+                self._responder(protocolo.empaquetar_nack(protocolo.SEQ_DESCONOCIDO, protocolo.ERROR_CRC))
+                self.contadores["nacks"] += 1
+
+            ahora = time.monotonic()
+            for evento in [e for e in self.eventos if e[0] <= ahora]:
+                self.eventos.remove(evento)
+                evento[2]()
+
+    def estado(self):
+        return {"modo": self.modo, "bombas": list(self.bombas), "servo": self.servo,
+                "led_v": self.led_v, "errores_crc": self.lector.errores_crc, **self.contadores}
+
+    def cerrar(self):
+        self.running = False
+        self.hilo.join(timeout=2)
+        self.transporte.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Emulador de la Pico para pruebas sin hardware")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--ruta", help="tty a usar, p.ej. el pty que imprime el runtime asyncio")
+    grupo.add_argument("--pty", action="store_true", help="Crear un pty e imprimir la ruta para GestorSerial")
+    grupo.add_argument("--tcp", type=int, metavar="PUERTO", help="Esperar una conexión TCP en 127.0.0.1")
+    parser.add_argument("--tiempo-comando", type=float, default=0.0)
+    parser.add_argument("--prob-corrupcion", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.ruta:
+        extremo = transportes.abrir_ruta(args.ruta)
+    elif args.pty:
+        # El emulador usa el maestro; el esclavo queda abierto para que el pty no se cierre
+        extremo, lado_host = transportes.par_pty()
+        print(f"🔌 [EMULADOR] Conectar GestorSerial(puerto='{lado_host.nombre}')")
+    else:
+        import socket
+        servidor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        servidor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        servidor.bind(("127.0.0.1", args.tcp))
+        servidor.listen(1)
+        print(f"🔌 [EMULADOR] Esperando conexión en 127.0.0.1:{args.tcp}")
+        extremo = transportes.TransporteSocket(servidor.accept()[0])
+
+    emulador = EmuladorPico(extremo, args.tiempo_comando, args.prob_corrupcion, verboso=True)
+    try:
+        while True:
+            time.sleep(5)
+            print(f"📊 [EMULADOR] {emulador.estado()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulador.cerrar()
@@ -1,6 +1,5 @@
 import machine
 import time
-import sys
 
 # --- 1. CONFIGURACIÓN DE HARDWARE ---
 
@@ -66,7 +65,120 @@ def control_fuego_zona(zona, estado):
         accion = "ENCENDIDA" if estado else "APAGADA"
         print(f"🔥 Fuego Zona {zona}: {accion}")
 
-# --- 3. BUCLE PRINCIPAL ---
+# --- 3. TAREAS PROGRAMADAS (sin sleeps: la UART nunca se bloquea) ---
+eventos = []  # [(ticks_ms de vencimiento, función)]
+
+def programar(ms, funcion):
+    eventos.append((time.ticks_add(time.ticks_ms(), ms), funcion))
+
+def ejecutar_vencidos():
+    ahora = time.ticks_ms()
+    i = 0
+    while i < len(eventos):
+        vence, funcion = eventos[i]
+        if time.ticks_diff(ahora, vence) >= 0:
+            eventos.pop(i)
+            funcion()
+        else:
+            i += 1
+
+# --- 4. COMANDOS (protocolo binario, ver protocolo.py) ---
+# Subir a la Pico ambos archivos de firmware_pico/: main.py y protocolo.py
+from protocolo import (LectorTramas, decodificar_payload, decodificar_comando,
+                       empaquetar_ack, empaquetar_nack, TramaInvalida, TIPO_COMANDOS,
+                       ERROR_CRC, ERROR_OPCODE, ERROR_FORMATO, SEQ_DESCONOCIDO,
+                       OP_MODO_AUTO, OP_MODO_MANUAL, OP_FUEGO, OP_NUMERO,
+                       OP_PUNO_CERRADO, OP_LETRA, FUEGO_ON)
+
+def cmd_modo_auto(arg):
+    # Parpadeo de advertencia (Modo Fuego): 3 destellos de 100 ms
+    for k in range(3):
+        programar(200 * k, led_onboard.on)
+        programar(200 * k + 100, led_onboard.off)
+    # Apagar todo por seguridad al cambiar
+    control_bomba_manual(0)
+
+def cmd_modo_manual(arg):
+    # Luz fija breve (Modo Gestos)
+    led_onboard.on()
+    programar(1000, led_onboard.off)
+    control_bomba_manual(0)
+
+def cmd_fuego(arg):
+    control_fuego_zona(arg & 0x7F, bool(arg & FUEGO_ON))
+
+def cmd_numero(arg):
+    control_bomba_manual(arg)
+
+def cmd_puno(arg):
+    control_bomba_manual(0)
+
+def cmd_letra(arg):
+    letra = chr(arg)
+    if letra == "L":
+        print("🚪 Puerta Abierta")
+        mover_servo(90)
+    elif letra == "O":
+        print("🚪 Puerta Cerrada")
+        mover_servo(0)
+    elif letra == "V":
+        print("💡 LED V")
+        led_v.on()
+        programar(500, led_v.off)
+
+# Despacho directo por opcode (sin cadenas de startswith)
+MANEJADORES = {
+    OP_MODO_AUTO: cmd_modo_auto,
+    OP_MODO_MANUAL: cmd_modo_manual,
+    OP_FUEGO: cmd_fuego,
+    OP_NUMERO: cmd_numero,
+    OP_PUNO_CERRADO: cmd_puno,
+    OP_LETRA: cmd_letra,
+}
+
+# Última trama ejecutada: [seq, ticks_ms de recepción, respuesta enviada].
+# Si el ACK se pierde la Pi reenvía la misma trama; se responde de nuevo sin
+# volver a ejecutarla (un MODO_* repetido apagaría bombas encendidas después).
+# Pasada la ventana, el mismo SEQ es una trama nueva (p.ej. la Pi se reinició).
+VENTANA_DUPLICADO_MS = 2000
+ultima_trama = [SEQ_DESCONOCIDO, 0, b""]
+
+def atender_trama(payload):
+    """Ejecuta una trama de comandos y responde ACK (o NACK si hay opcodes desconocidos)"""
+    t_recepcion = time.ticks_ms()
+    t0 = time.ticks_us()
+    try:
+        tipo, seq, comandos = decodificar_payload(payload)
+    except TramaInvalida as e:
+        # El SEQ no es confiable: la Pi lo trata como un error de CRC y reenvía
+        print(f"⚠️ Trama inválida: {e}")
+        uart.write(empaquetar_nack(SEQ_DESCONOCIDO, ERROR_FORMATO))
+        return
+    if tipo != TIPO_COMANDOS: return
+
+    if seq == ultima_trama[0] and time.ticks_diff(t_recepcion, ultima_trama[1]) < VENTANA_DUPLICADO_MS:
+        print(f"🔁 Trama {seq} repetida: solo se confirma")
+        ultima_trama[1] = t_recepcion
+        uart.write(ultima_trama[2])
+        return
+
+    desconocido = False
+    for op, arg in comandos:
+        print(f"📨 Cmd: {decodificar_comando(op, arg)}")
+        manejador = MANEJADORES.get(op)
+        if manejador:
+            manejador(arg)
+        else:
+            desconocido = True
+
+    if desconocido:
+        respuesta = empaquetar_nack(seq, ERROR_OPCODE)
+    else:
+        respuesta = empaquetar_ack(seq, t_recepcion, time.ticks_diff(time.ticks_us(), t0))
+    ultima_trama[0], ultima_trama[1], ultima_trama[2] = seq, t_recepcion, respuesta
+    uart.write(respuesta)
+
+# --- 5. BUCLE PRINCIPAL ---
 print("✅ Pico 2W Lista. Esperando comandos UART...")
 
 # Secuencia de arranque (Parpadeo rápido)
@@ -75,62 +187,20 @@ for _ in range(5):
     time.sleep(0.05)
 led_onboard.off()
 
+lector = LectorTramas()
+
 while True:
     if uart.any():
         try:
-            # Leer mensaje y limpiar espacios
-            data = uart.readline()
-            if not data: continue
-            
-            msg = data.decode('utf-8').strip()
-            print(f"📨 Cmd: {msg}")
-
-            # --- A. CAMBIO DE MODOS (Feedback Visual) ---
-            if msg == "MODO_AUTO":
-                # Parpadeo de advertencia (Modo Fuego)
-                for _ in range(3):
-                    led_onboard.on(); time.sleep(0.1); led_onboard.off(); time.sleep(0.1)
-                # Apagar todo por seguridad al cambiar
-                control_bomba_manual(0) 
-                
-            elif msg == "MODO_MANUAL":
-                # Luz fija breve (Modo Gestos)
-                led_onboard.on()
-                time.sleep(1)
-                led_onboard.off()
-                control_bomba_manual(0)
-
-            # --- B. ACCIONES MODO AUTOMÁTICO (FUEGO) ---
-            elif msg.startswith("FUEGO_"):
-                # Formato: FUEGO_1_ON
-                partes = msg.split('_')
-                zona = int(partes[1])
-                estado = (partes[2] == "ON")
-                control_fuego_zona(zona, estado)
-
-            # --- C. ACCIONES MODO MANUAL (GESTOS/TARJETAS) ---
-            elif msg.startswith("NUMERO_"):
-                # Formato: NUMERO_3
-                num = int(msg.split('_')[1])
-                control_bomba_manual(num)
-            
-            elif msg == "PUÑO_CERRADO":
-                control_bomba_manual(0)
-
-            elif msg == "L":
-                print("🚪 Puerta Abierta")
-                mover_servo(90)
-            
-            elif msg == "O":
-                print("🚪 Puerta Cerrada")
-                mover_servo(0)
-            
-            elif msg == "V":
-                print("💡 LED V")
-                led_v.on(); time.sleep(0.5); led_v.off()
+            errores_previos = lector.errores_crc
+            for payload in lector.alimentar(uart.read()):
+                atender_trama(payload)
+            if lector.errores_crc != errores_previos:
+                uart.write(empaquetar_nack(SEQ_DESCONOCIDO, ERROR_CRC))
 
         except Exception as e:
             print(f"⚠️ Error procesando: {e}")
-            
+
+    ejecutar_vencidos()
     # Pequeña pausa para no saturar el CPU
-    time.sleep(0.01)
\ No newline at end of file
+    time.sleep_ms(1)
@@ -0,0 +1,175 @@
+# Protocolo binario Pi <-> Pico por UART.
+# Este archivo lo usan ambos lados, así que solo usa lo que también existe en
+# MicroPython. firmware_pico/protocolo.py es una copia idéntica que se sube a
+# la Pico junto a main.py (test_protocolo.py verifica que no diverjan).
+#
+# Trama:  SOF (0xA5) | LEN | PAYLOAD (LEN bytes) | CRC-8 (sobre LEN + PAYLOAD)
+# Payload: TIPO | SEQ | datos
+#   COMANDOS (Pi -> Pico): comandos de 2 bytes (opcode, argumento), varios por trama
+#   ACK      (Pico -> Pi): ticks_ms de recepción (u32) + duración de ejecución en us (u32)
+#   NACK     (Pico -> Pi): código de error (u8)
+
+import struct
+
+SOF = 0xA5
+MAX_PAYLOAD = 254
+MAX_COMANDOS = (MAX_PAYLOAD - 2) // 2
+
+TIPO_COMANDOS = 0x01
+TIPO_ACK = 0x02
+TIPO_NACK = 0x03
+
+ERROR_CRC = 0x01       # Trama corrupta (su SEQ no se puede leer)
+ERROR_OPCODE = 0x02    # Opcode desconocido
+ERROR_FORMATO = 0x03   # CRC válido pero largo imposible para su TIPO (se trata como ERROR_CRC)
+SEQ_DESCONOCIDO = 0xFF # La Pi numera de 0 a 254
+
+# --- OPCODES ---
+OP_MODO_AUTO = 0x01
+OP_MODO_MANUAL = 0x02
+OP_FUEGO = 0x10         # arg = zona | 0x80 si se enciende
+OP_NUMERO = 0x20        # arg = cantidad de dedos
+OP_PUNO_CERRADO = 0x21
+OP_LETRA = 0x30         # arg = código ASCII de 'L', 'O' o 'V'
+
+FUEGO_ON = 0x80
+
+class TramaInvalida(ValueError):
+    """Payload con CRC válido que no se puede decodificar (corto, impar o de TIPO desconocido)"""
+
+# --- CRC-8 (polinomio 0x07), tabla calculada al importar ---
+def _tabla_crc8():
+    tabla = bytearray(256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        tabla[i] = crc
+    return bytes(tabla)
+
+TABLA_CRC8 = _tabla_crc8()
+
+def crc8(datos, crc=0):
+    for b in datos:
+        crc = TABLA_CRC8[crc ^ b]
+    return crc
+
+# --- COMANDOS DE TEXTO <-> (opcode, argumento) ---
+def _argumento(texto, maximo, comando):
+    """Entero de 0 a maximo; el argumento viaja en un solo byte"""
+    if not texto.isdigit() or int(texto) > maximo:
+        raise ValueError("Argumento fuera de rango (0-" + str(maximo) + "): " + comando)
+    return int(texto)
+
+def codificar_comando(comando):
+    """
+    'FUEGO_1_ON' -> (OP_FUEGO, 0x81). ValueError si el comando no existe o su
+    argumento no entra en un byte (se valida al encolar, no al escribir la trama).
+    """
+    if comando == "MODO_AUTO": return (OP_MODO_AUTO, 0)
+    if comando == "MODO_MANUAL": return (OP_MODO_MANUAL, 0)
+    if comando == "PUÑO_CERRADO": return (OP_PUNO_CERRADO, 0)
+    if comando in ("L", "O", "V"): return (OP_LETRA, ord(comando))
+    partes = comando.split("_")
+    if partes[0] == "NUMERO" and len(partes) == 2:
+        return (OP_NUMERO, _argumento(partes[1], 0xFF, comando))
+    if partes[0] == "FUEGO" and len(partes) == 3 and partes[2] in ("ON", "OFF"):
+        zona = _argumento(partes[1], 0x7F, comando)  # El bit alto es ON/OFF
+        return (OP_FUEGO, zona | (FUEGO_ON if partes[2] == "ON" else 0))
+    raise ValueError("Comando desconocido: " + comando)
+
+def decodificar_comando(op, arg):
+    """Inversa de codificar_comando (para logs y el emulador)"""
+    if op == OP_MODO_AUTO: return "MODO_AUTO"
+    if op == OP_MODO_MANUAL: return "MODO_MANUAL"
+    if op == OP_PUNO_CERRADO: return "PUÑO_CERRADO"
+    if op == OP_LETRA: return chr(arg)
+    if op == OP_NUMERO: return "NUMERO_" + str(arg)
+    if op == OP_FUEGO:
+        return "FUEGO_" + str(arg & 0x7F) + ("_ON" if arg & FUEGO_ON else "_OFF")
+    return "OP_" + hex(op)
+
+# --- TRAMAS ---
+def empaquetar(comandos, seq):
+    """Lista de hasta MAX_COMANDOS (opcode, argumento) -> trama COMANDOS"""
+    if len(comandos) > MAX_COMANDOS:
+        raise ValueError("Demasiados comandos para una trama")
+    payload = bytearray((TIPO_COMANDOS, seq))
+    for op, arg in comandos:
+        payload.append(op)
+        payload.append(arg)
+    return _trama(payload)
+
+def empaquetar_ack(seq, t_ms, duracion_us):
+    return _trama(struct.pack("<BBII", TIPO_ACK, seq, t_ms & 0xFFFFFFFF, duracion_us & 0xFFFFFFFF))
+
+def empaquetar_nack(seq, codigo):
+    return _trama(bytes((TIPO_NACK, seq, codigo)))
+
+def _trama(payload):
+    cabecera = bytes((len(payload),))
+    return bytes((SOF,)) + cabecera + bytes(payload) + bytes((crc8(payload, crc8(cabecera)),))
+
+class LectorTramas:
+    """
+    Reensambla tramas a partir de bytes sueltos de la UART.
+    Ante un CRC inválido descarta la trama y vuelve a buscar el SOF.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+        self.errores_crc = 0
+
+    def alimentar(self, datos):
+        """Agrega bytes recibidos y retorna la lista de payloads completos"""
+        if datos:
+            self.buffer.extend(datos)
+        payloads = []
+        while True:
+            # Sincronizar con el inicio de trama
+            # (bytearray.find no existe en MicroPython)
+            inicio = 0
+            while inicio < len(self.buffer) and self.buffer[inicio] != SOF:
+                inicio += 1
+            if inicio == len(self.buffer):
+                self.buffer = bytearray()
+                break
+            if inicio > 0:
+                self.buffer = self.buffer[inicio:]
+            if len(self.buffer) < 2:
+                break
+            largo = self.buffer[1]
+            total = largo + 3
+            if len(self.buffer) < total:
+                break
+            if largo >= 2 and crc8(self.buffer[1:total - 1]) == self.buffer[total - 1]:
+                payloads.append(bytes(self.buffer[2:total - 1]))
+                self.buffer = self.buffer[total:]
+            else:
+                # Trama corrupta (o sin TIPO/SEQ): saltar este SOF y resincronizar
+                self.errores_crc += 1
+                self.buffer = self.buffer[1:]
+        return payloads
+
+def decodificar_payload(payload):
+    """
+    Payload -> (tipo, seq, datos). datos es la lista de (opcode, argumento)
+    para COMANDOS, (t_ms, duracion_us) para ACK y el código para NACK.
+    TramaInvalida si el largo no corresponde al TIPO: con bytes perdidos una
+    trama truncada pasa el CRC-8 una de cada 256 veces.
+    """
+    if len(payload) < 2:
+        raise TramaInvalida("Payload sin TIPO/SEQ")
+    tipo, seq = payload[0], payload[1]
+    if tipo == TIPO_ACK:
+        if len(payload) < 10:
+            raise TramaInvalida("ACK de " + str(len(payload)) + " bytes")
+        return tipo, seq, struct.unpack("<II", bytes(payload[2:10]))
+    if tipo == TIPO_NACK:
+        if len(payload) < 3:
+            raise TramaInvalida("NACK sin código")
+        return tipo, seq, payload[2]
+    if tipo == TIPO_COMANDOS:
+        if len(payload) % 2:
+            raise TramaInvalida("Comando incompleto")
+        return tipo, seq, [(payload[i], payload[i + 1]) for i in range(2, len(payload), 2)]
+    raise TramaInvalida("TIPO desconocido: " + hex(tipo))
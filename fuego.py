@@ -0,0 +1,166 @@
+import cv2
+import numpy as np
+
+class DetectorFuego:
+    """
+    Detección de fuego por color en una grilla de filas x columnas zonas.
+    Convierte a HSV y umbraliza una sola vez por frame (opcionalmente sobre
+    una imagen reducida) y obtiene el conteo de todas las zonas de una
+    imagen integral, así el costo no crece con la cantidad de zonas.
+    """
+    def __init__(self, filas=1, columnas=3, escala=0.5, umbral_px=2000,
+                 hsv_bajo=(18, 50, 50), hsv_alto=(35, 255, 255)):
+        self.filas = filas
+        self.columnas = columnas
+        self.escala = escala
+        self.umbral_px = umbral_px  # Píxeles de fuego por zona, medidos a resolución completa
+
+        # Límites y buffers reservados una sola vez
+        self.hsv_bajo = np.array(hsv_bajo, dtype=np.uint8)
+        self.hsv_alto = np.array(hsv_alto, dtype=np.uint8)
+        self.pequeno = None
+        self.hsv = None
+        self.mascara = None
+        self.binaria = None
+        self.integral = None
+        self.forma = None
+
+    def _preparar(self, alto, ancho):
+        """Bordes de zona (en la imagen reducida) para el tamaño de frame dado"""
+        self.forma = (alto, ancho)
+        self.alto_red = max(1, int(round(alto * self.escala)))
+        self.ancho_red = max(1, int(round(ancho * self.escala)))
+        self.bordes_y = np.linspace(0, self.alto_red, self.filas + 1).astype(np.intp)
+        self.bordes_x = np.linspace(0, self.ancho_red, self.columnas + 1).astype(np.intp)
+        # Un píxel reducido representa 1/escala² píxeles del frame original
+        self.factor_area = (alto * ancho) / float(self.alto_red * self.ancho_red)
+
+    def reducir(self, frame_bgr):
+        """Frame a la resolución de análisis (buffer reutilizado)"""
+        alto, ancho = frame_bgr.shape[:2]
+        if self.forma != (alto, ancho):
+            self._preparar(alto, ancho)
+        if self.escala == 1.0:
+            return frame_bgr
+        self.pequeno = cv2.resize(frame_bgr, (self.ancho_red, self.alto_red),
+                                  dst=self.pequeno, interpolation=cv2.INTER_AREA)
+        return self.pequeno
+
+    def sumar_por_zona(self, binaria):
+        """Suma de una imagen 0/1 en cada zona de la grilla, con una sola integral"""
+        self.integral = cv2.integral(binaria, sum=self.integral, sdepth=cv2.CV_32S)
+        # Cuatro esquinas de la integral por rectángulo, para toda la grilla a la vez
+        y0, y1 = self.bordes_y[:-1], self.bordes_y[1:]
+        x0, x1 = self.bordes_x[:-1], self.bordes_x[1:]
+        S = self.integral
+        return S[np.ix_(y1, x1)] - S[np.ix_(y0, x1)] - S[np.ix_(y1, x0)] + S[np.ix_(y0, x0)]
+
+    def contar_reducido(self, pequeno):
+        """Conteo de todas las zonas sobre un frame ya reducido"""
+        self.hsv = cv2.cvtColor(pequeno, cv2.COLOR_BGR2HSV, dst=self.hsv)
+        self.mascara = cv2.inRange(self.hsv, self.hsv_bajo, self.hsv_alto, dst=self.mascara)
+        # 0/255 -> 0/1 para que la integral cuente píxeles
+        self.binaria = cv2.threshold(self.mascara, 0, 1, cv2.THRESH_BINARY, dst=self.binaria)[1]
+        return self.sumar_por_zona(self.binaria) * self.factor_area
+
+    def contar_zona(self, pequeno, fila, columna):
+        """Conteo de una sola zona (para actualizaciones incrementales)"""
+        roi = pequeno[self.bordes_y[fila]:self.bordes_y[fila + 1],
+                      self.bordes_x[columna]:self.bordes_x[columna + 1]]
+        hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
+        return cv2.countNonZero(cv2.inRange(hsv, self.hsv_bajo, self.hsv_alto)) * self.factor_area
+
+    def contar(self, frame_bgr):
+        """Retorna un array (filas, columnas) con los píxeles de fuego por zona"""
+        return self.contar_reducido(self.reducir(frame_bgr))
+
+    def detectar(self, frame_bgr):
+        """Retorna un array bool aplanado (fila por fila): True = hay fuego en la zona"""
+        return (self.contar(frame_bgr) > self.umbral_px).ravel()
+
+    def rectangulos(self, alto, ancho):
+        """(x0, y0, x1, y1) de cada zona en coordenadas del frame, mismo orden que detectar()"""
+        ys = np.linspace(0, alto, self.filas + 1).astype(int)
+        xs = np.linspace(0, ancho, self.columnas + 1).astype(int)
+        return [(xs[c], ys[f], xs[c + 1], ys[f + 1])
+                for f in range(self.filas) for c in range(self.columnas)]
+
+    @property
+    def num_zonas(self):
+        return self.filas * self.columnas
+
+class SeguidorFuego:
+    """
+    Seguimiento temporal del fuego por zona.
+    - Media móvil exponencial del conteo y doble umbral (histéresis) para
+      que el parpadeo de la llama no alterne FUEGO_n_ON/OFF.
+    - Solo se vuelve a umbralizar el color en las zonas donde cambió la
+      imagen (diferencia de grises contra la última referencia).
+    """
+    def __init__(self, detector, alfa=0.4, umbral_on=2000, umbral_off=1000,
+                 umbral_cambio=12, fraccion_cambio=0.01, refresco_frames=30):
+        self.detector = detector
+        self.alfa = alfa
+        self.umbral_on = umbral_on
+        self.umbral_off = umbral_off
+        self.umbral_cambio = umbral_cambio      # Diferencia de gris (0-255) que cuenta como cambio
+        self.fraccion_cambio = fraccion_cambio  # Fracción de la zona que debe cambiar para recalcular
+        self.refresco_frames = refresco_frames  # Recalculo completo periódico
+        self.reiniciar()
+
+    def reiniciar(self):
+        n = (self.detector.filas, self.detector.columnas)
+        self.conteo = np.zeros(n, dtype=np.float64)
+        self.media = np.zeros(n, dtype=np.float64)
+        self.estados = np.zeros(self.detector.num_zonas, dtype=bool)
+        self.referencia = None
+        self.gris = None
+        self.diff = None
+        self.frames = 0
+        self.zonas_recalculadas = 0
+
+    def _zonas_cambiadas(self, gris):
+        self.diff = cv2.absdiff(gris, self.referencia, dst=self.diff)
+        self.diff = cv2.threshold(self.diff, self.umbral_cambio, 1, cv2.THRESH_BINARY, dst=self.diff)[1]
+        cambios = self.detector.sumar_por_zona(self.diff)
+        alto = np.diff(self.detector.bordes_y)[:, None]
+        ancho = np.diff(self.detector.bordes_x)[None, :]
+        return cambios > self.fraccion_cambio * alto * ancho
+
+    def actualizar(self, frame_bgr):
+        """Retorna la lista de transiciones [(zona, encendido), ...] de este frame"""
+        det = self.detector
+        pequeno = det.reducir(frame_bgr)
+        self.gris = cv2.cvtColor(pequeno, cv2.COLOR_BGR2GRAY, dst=self.gris)
+        self.frames += 1
+
+        if self.referencia is None or self.frames % self.refresco_frames == 0:
+            cambiadas = np.ones(self.conteo.shape, dtype=bool)
+        else:
+            cambiadas = self._zonas_cambiadas(self.gris)
+
+        if cambiadas.all():
+            self.conteo[:] = det.contar_reducido(pequeno)
+            if self.referencia is None:
+                self.referencia = self.gris.copy()
+            else:
+                np.copyto(self.referencia, self.gris)
+        else:
+            for f, c in zip(*np.nonzero(cambiadas)):
+                self.conteo[f, c] = det.contar_zona(pequeno, f, c)
+                # La referencia solo avanza donde se recalculó: el cambio lento se acumula
+                ys = slice(det.bordes_y[f], det.bordes_y[f + 1])
+                xs = slice(det.bordes_x[c], det.bordes_x[c + 1])
+                self.referencia[ys, xs] = self.gris[ys, xs]
+        self.zonas_recalculadas += int(cambiadas.sum())
+
+        # EMA + histéresis (zonas quietas conservan su conteo anterior)
+        self.media += self.alfa * (self.conteo - self.media)
+        media = self.media.ravel()
+        encender = ~self.estados & (media > self.umbral_on)
+        apagar = self.estados & (media < self.umbral_off)
+        self.estados[encender] = True
+        self.estados[apagar] = False
+
+        return ([(int(i), True) for i in np.flatnonzero(encender)] +
+                [(int(i), False) for i in np.flatnonzero(apagar)])
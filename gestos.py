@@ -0,0 +1,135 @@
+import json
+import numpy as np
+
+from logica_manos import CONTEO_DEDOS
+
+LADOS = {'Right': 0, 'Left': 1}
+
+def _dedos_a_mascara(dedos):
+    return sum(int(d) << i for i, d in enumerate(dedos))
+
+class MotorGestos:
+    """
+    Clasificador de gestos definido en un archivo JSON (ver gestos.json).
+    Las reglas se compilan a una tabla [lado, máscara, regla] y a un
+    conjunto de predicados geométricos que se evalúan una vez por lote de
+    manos; la regla ganadora sale de un argmax, sin cadenas de if.
+    """
+    def __init__(self, ruta="gestos.json"):
+        with open(ruta, encoding="utf-8") as f:
+            reglas = json.load(f)["gestos"]
+        self._compilar(reglas)
+        print(f"✋ [GESTOS] {len(reglas)} reglas cargadas desde {ruta}")
+
+    def _compilar(self, reglas):
+        n = len(reglas)
+        self.tabla = np.zeros((len(LADOS), 32, n), dtype=bool)
+        self.nombres = np.full((n, 32), None, dtype=object)
+        self.predicados = []  # (índice de regla, punto_a, punto_b, min, max)
+
+        for r, regla in enumerate(reglas):
+            lados = list(LADOS.values()) if regla.get("mano", "cualquiera") == "cualquiera" else [LADOS[regla["mano"]]]
+
+            dedos = regla.get("dedos", "cualquiera")
+            if dedos == "cualquiera":
+                mascaras = range(32)
+            elif isinstance(dedos[0], list):
+                mascaras = [_dedos_a_mascara(d) for d in dedos]
+            else:
+                mascaras = [_dedos_a_mascara(dedos)]
+
+            for lado in lados:
+                self.tabla[lado, list(mascaras), r] = True
+
+            # Nombre por máscara (permite plantillas como "NUMERO_{conteo}")
+            for m in range(32):
+                self.nombres[r, m] = regla["nombre"].format(conteo=int(CONTEO_DEDOS[m]))
+
+            pred = regla.get("predicado")
+            if pred:
+                if pred["tipo"] != "distancia":
+                    raise ValueError(f"Predicado desconocido en '{regla['nombre']}': {pred['tipo']}")
+                a, b = pred["puntos"]
+                self.predicados.append((r, a, b, pred.get("min", 0.0), pred.get("max", np.inf)))
+
+        self.num_reglas = n
+        if self.predicados:
+            cols = np.array([p[0] for p in self.predicados])
+            self.pred_reglas = cols
+            self.pred_a = np.array([p[1] for p in self.predicados])
+            self.pred_b = np.array([p[2] for p in self.predicados])
+            self.pred_min = np.array([p[3] for p in self.predicados], dtype=np.float32)
+            self.pred_max = np.array([p[4] for p in self.predicados], dtype=np.float32)
+
+    def clasificar(self, puntos, etiquetas, mascaras):
+        """
+        puntos (H,21,3), etiquetas ['Right'|'Left'], mascaras (H,) de analizar_dedos_lote.
+        Retorna una lista con el nombre del gesto de cada mano (o None).
+        """
+        if len(etiquetas) == 0:
+            return []
+        lados = np.array([LADOS[e] for e in etiquetas])
+        cumple = self.tabla[lados, mascaras].copy()  # (H, reglas)
+
+        if self.predicados:
+            # Todas las distancias de todas las reglas para todas las manos a la vez
+            delta = puntos[:, self.pred_a, :2] - puntos[:, self.pred_b, :2]
+            dist = np.hypot(delta[..., 0], delta[..., 1])  # (H, predicados)
+            cumple[:, self.pred_reglas] &= (dist >= self.pred_min) & (dist < self.pred_max)
+
+        ganadora = np.argmax(cumple, axis=1)
+        hay = cumple[np.arange(len(lados)), ganadora]
+        return [self.nombres[r, m] if ok else None for r, m, ok in zip(ganadora, mascaras, hay)]
+
+class SeguidorGestos:
+    """
+    Confirmación temporal de gestos por mano.
+    Guarda los últimos M gestos en un anillo fijo y confirma uno cuando
+    aparece al menos N veces. Emite eventos solo en las transiciones:
+    ('PRESIONADO', g), ('MANTENIDO', g) tras tiempo_mantener y ('LIBERADO', g).
+    """
+    def __init__(self, ventana=5, minimo=3, tiempo_mantener=1.0, manos=('Right', 'Left')):
+        self.ventana = ventana
+        self.minimo = minimo
+        self.tiempo_mantener = tiempo_mantener
+
+        self.ids = {None: 0}   # Nombre de gesto -> id (0 = sin gesto)
+        self.nombres = [None]
+        self.anillos = {m: np.zeros(ventana, dtype=np.int32) for m in manos}
+        self.posicion = {m: 0 for m in manos}
+        self.confirmado = {m: None for m in manos}
+        self.desde = {m: 0.0 for m in manos}
+        self.mantenido = {m: False for m in manos}
+
+    def _id(self, gesto):
+        if gesto not in self.ids:
+            self.ids[gesto] = len(self.nombres)
+            self.nombres.append(gesto)
+        return self.ids[gesto]
+
+    def actualizar(self, mano, gesto, ahora):
+        """Registra la observación de un frame y retorna la lista de eventos"""
+        anillo = self.anillos[mano]
+        anillo[self.posicion[mano]] = self._id(gesto)
+        self.posicion[mano] = (self.posicion[mano] + 1) % self.ventana
+
+        votos = np.bincount(anillo, minlength=len(self.nombres))
+        ganador = int(np.argmax(votos))
+        if votos[ganador] < self.minimo:
+            return []  # Sin mayoría: se mantiene lo confirmado
+
+        eventos = []
+        nuevo = self.nombres[ganador]
+        anterior = self.confirmado[mano]
+        if nuevo != anterior:
+            if anterior is not None:
+                eventos.append(('LIBERADO', anterior))
+            if nuevo is not None:
+                eventos.append(('PRESIONADO', nuevo))
+            self.confirmado[mano] = nuevo
+            self.desde[mano] = ahora
+            self.mantenido[mano] = False
+        elif nuevo is not None and not self.mantenido[mano] and ahora - self.desde[mano] >= self.tiempo_mantener:
+            eventos.append(('MANTENIDO', nuevo))
+            self.mantenido[mano] = True
+        return eventos
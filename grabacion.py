@@ -0,0 +1,108 @@
+import json
+import numpy as np
+import os
+import time
+
+# Formato en disco (un directorio por grabación):
+#   frames.raw   -> frames BGR crudos concatenados (N x alto x ancho x 3, uint8)
+#   indice.json  -> forma y dtype de los frames (se escribe con el primer frame)
+#   tiempos.txt  -> timestamp de captura de cada frame, uno por línea
+# Todo se escribe a medida que llegan los frames: si el proceso muere, la
+# grabación se puede reproducir hasta el último frame completo.
+ARCHIVO_FRAMES = "frames.raw"
+ARCHIVO_INDICE = "indice.json"
+ARCHIVO_TIEMPOS = "tiempos.txt"
+
+class GrabadorFrames:
+    """Escribe frames crudos + timestamps para reproducirlos luego con FuenteReplay"""
+    def __init__(self, ruta):
+        self.ruta = ruta
+        os.makedirs(ruta, exist_ok=True)
+        self.archivo = open(os.path.join(ruta, ARCHIVO_FRAMES), "wb")
+        self.archivo_tiempos = open(os.path.join(ruta, ARCHIVO_TIEMPOS), "w")
+        self.forma = None
+        self.num_frames = 0
+
+    def escribir(self, frame, t_captura):
+        if self.forma is None:
+            self.forma = list(frame.shape)
+            with open(os.path.join(self.ruta, ARCHIVO_INDICE), "w") as f:
+                json.dump({"forma": self.forma, "dtype": "uint8"}, f)
+        elif list(frame.shape) != self.forma:
+            raise ValueError(f"Forma de frame distinta: {frame.shape} != {self.forma}")
+        self.archivo.write(np.ascontiguousarray(frame).data)
+        self.archivo.flush()
+        # El timestamp va después del frame: nunca hay tiempo sin su frame en disco
+        self.archivo_tiempos.write(f"{t_captura!r}\n")
+        self.archivo_tiempos.flush()
+        self.num_frames += 1
+
+    def cerrar(self):
+        self.archivo.close()
+        self.archivo_tiempos.close()
+        print(f"💾 [GRABACION] {self.num_frames} frames guardados en {self.ruta}")
+
+class FuenteGrabada:
+    """Envuelve una fuente (p.ej. CapturaCamara) y graba todo lo que entrega"""
+    def __init__(self, fuente, ruta):
+        self.fuente = fuente
+        self.grabador = GrabadorFrames(ruta)
+
+    def leer(self, timeout=1.0):
+        ok, frame, t_captura = self.fuente.leer(timeout)
+        if ok:
+            self.grabador.escribir(frame, t_captura)
+        return ok, frame, t_captura
+
+    def release(self):
+        self.fuente.release()
+        self.grabador.cerrar()
+
+class FuenteReplay:
+    """
+    Reproduce una grabación con la misma interfaz que CapturaCamara.
+    tiempo_real=True respeta los intervalos originales; False entrega los
+    frames a máxima velocidad (modo determinista).
+    """
+    def __init__(self, ruta, tiempo_real=True):
+        with open(os.path.join(ruta, ARCHIVO_INDICE)) as f:
+            indice = json.load(f)
+        if "tiempos" in indice:
+            self.tiempos = indice["tiempos"]  # Grabaciones anteriores: índice completo al cerrar
+        else:
+            with open(os.path.join(ruta, ARCHIVO_TIEMPOS)) as f:
+                # Una última línea cortada (proceso interrumpido) se descarta
+                self.tiempos = [float(l) for l in f.read().split("\n")[:-1]]
+        # Si el proceso murió a mitad de un frame, se reproduce hasta el último completo
+        ruta_frames = os.path.join(ruta, ARCHIVO_FRAMES)
+        bytes_frame = int(np.prod(indice["forma"])) * np.dtype(indice["dtype"]).itemsize
+        del self.tiempos[os.path.getsize(ruta_frames) // bytes_frame:]
+        self.frames = np.memmap(ruta_frames, dtype=indice["dtype"],
+                                mode="r", shape=tuple([len(self.tiempos)] + indice["forma"]))
+        self.tiempo_real = tiempo_real
+        self.determinista = not tiempo_real
+        self.posicion = 0
+        self.inicio = None
+        self.salida = np.empty(self.frames.shape[1:], dtype=self.frames.dtype)
+        print(f"▶️ [REPLAY] {len(self.tiempos)} frames desde {ruta} "
+              f"({'tiempo real' if tiempo_real else 'máxima velocidad'})")
+
+    def leer(self, timeout=1.0):
+        if self.posicion >= len(self.tiempos):
+            return False, None, 0.0
+        i = self.posicion
+        self.posicion += 1
+
+        if self.tiempo_real:
+            if self.inicio is None:
+                self.inicio = time.time()
+            espera = (self.tiempos[i] - self.tiempos[0]) - (time.time() - self.inicio)
+            if espera > 0:
+                time.sleep(espera)
+
+        # Copia al buffer de salida: el memmap es de solo lectura
+        np.copyto(self.salida, self.frames[i])
+        return True, self.salida, self.tiempos[i]
+
+    def release(self):
+        del self.frames
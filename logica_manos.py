@@ -1,4 +1,6 @@
+import itertools
 import math
+import numpy as np
 
 def analizar_dedos(landmarks, etiqueta_mano):
     """
@@ -33,4 +35,40 @@ def identificar_letra_mano(dedos, landmarks):
     if dedos == [1, 1, 0, 0, 0]: return "LETRA_L"
     if dedos == [0, 1, 1, 0, 0] or dedos == [1, 1, 1, 0, 0]: return "LETRA_V"
     
-    return None
\ No newline at end of file
+    return None
+
+# --- REPRESENTACIÓN NUMPY (lote de manos) ---
+# Cada mano se convierte una sola vez a un array (21, 3) float32 [x, y, z] y
+# el estado de los dedos es una máscara de bits: bit 0 = pulgar ... bit 4 = meñique.
+PUNTAS = np.array([8, 12, 16, 20])
+PESOS_DEDOS = np.array([2, 4, 8, 16])  # Bits de índice a meñique (el pulgar es el bit 0)
+
+# Dedos levantados por máscara (32 combinaciones posibles); los gestos están en gestos.json
+CONTEO_DEDOS = np.array([bin(m).count("1") for m in range(32)], dtype=np.int32)
+
+def landmarks_a_array(landmarks):
+    """Lista de landmarks de MediaPipe -> array (21, 3) float32"""
+    return np.fromiter(
+        itertools.chain.from_iterable((p.x, p.y, p.z) for p in landmarks),
+        dtype=np.float32, count=63
+    ).reshape(21, 3)
+
+def apilar_manos(resultado):
+    """
+    Convierte un resultado de hands.process a (puntos (H,21,3), etiquetas).
+    Retorna arrays vacíos si no hay manos.
+    """
+    if not resultado or not resultado.multi_hand_landmarks:
+        return np.empty((0, 21, 3), dtype=np.float32), []
+    puntos = np.stack([landmarks_a_array(m.landmark) for m in resultado.multi_hand_landmarks])
+    etiquetas = [h.classification[0].label for h in resultado.multi_handedness]
+    return puntos, etiquetas
+
+def analizar_dedos_lote(puntos, etiquetas):
+    """Máscara de dedos levantados por mano, shape (H,) int32"""
+    es_right = np.array([e == 'Right' for e in etiquetas], dtype=bool)
+    # Pulgar en X (invertido según la mano, por el espejo); el resto en Y (arriba = menor)
+    x4, x3 = puntos[:, 4, 0], puntos[:, 3, 0]
+    pulgar = np.where(es_right, x4 < x3, x4 > x3)
+    otros = puntos[:, PUNTAS, 1] < puntos[:, PUNTAS - 2, 1]
+    return (pulgar.astype(np.int32) + otros.astype(np.int32) @ PESOS_DEDOS).astype(np.int32)
@@ -1,14 +1,22 @@
+import argparse
 import cv2
-import mediapipe as mp
 import platform
 import time
 import socket
-import numpy as np
 import math
 
 # --- IMPORTACIÓN DE MÓDULOS ---
+from arranque import GestorArranque, ModuloDiferido, calentar_manos
 from comunicacion import GestorSerial
-from detector_ia import DetectorRoboflow
+from captura import CapturaCamara
+from detector_ia import DetectorRoboflow, DetectorConCompuerta
+from pipeline import PipelineInferencia, TAREAS_TODAS
+from grabacion import FuenteGrabada, FuenteReplay
+from fuego import DetectorFuego, SeguidorFuego
+from planificador import PlanificadorAdaptativo
+from salidas import crear_salida
+from gestos import MotorGestos, SeguidorGestos
+from rastreador_cajas import RastreadorCajas
 import logica_manos as manos
 
 # --- CONFIGURACIÓN ---
@@ -20,28 +28,42 @@ PERMISOS = {
     "NADIE":   []
 }
 MODELO_FILE = "modelo_tarjetas.tflite"
+GESTOS_FILE = "gestos.json"
 ANCHO_CAM, ALTO_CAM = 640, 480
+ZONAS_FUEGO = (1, 3)   # Grilla filas x columnas (una bomba por zona en la Pico)
+ESCALA_FUEGO = 0.5     # Resolución a la que se analiza el color
 
 class SistemaSeguridad:
-    def __init__(self):
+    def __init__(self, salida=None, fuente=None, registro_uart=None, comms=None, con_pipeline=True):
         print(f"🚀 Iniciando Sistema Final (Logs Activados) en {platform.system()}")
         
-        self.comms = GestorSerial()
-        self.cerebro_ia = DetectorRoboflow(MODELO_FILE, ETIQUETAS_MODELO)
-        
-        if platform.system() == 'Windows':
-            self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-        else:
-            self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, ANCHO_CAM)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, ALTO_CAM)
+        self.salida = salida or crear_salida('ventana', 'PiArchitect Final')
+        # Los tiempos de la lógica siguen al frame (reproducible en replay)
+        self.comms = comms or GestorSerial(registro=registro_uart, reloj=lambda: self.t_captura)
 
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False, max_num_hands=2,
-            model_complexity=0, min_detection_confidence=0.6, min_tracking_confidence=0.5
-        )
-        self.mp_draw = mp.solutions.drawing_utils
+        # Cámara, detector y manos arrancan en paralelo; solo la cámara se espera aquí
+        self.arranque = GestorArranque()
+        self.mp = ModuloDiferido("mediapipe", self.arranque)
+        self.arranque.iniciar("camara", lambda: fuente or CapturaCamara(0, ANCHO_CAM, ALTO_CAM))
+        self.arranque.iniciar("detector", self._crear_detector)
+        self.arranque.iniciar("manos", self._crear_manos)
+        # Se asignan en modelos_listos()
+        self.cerebro_ia = None
+        self.hands = None
+        self.mp_hands = self.mp_draw = None
+        self.error_modelos = None  # Texto en pantalla si el detector o las manos no cargaron
+
+        self.motor_gestos = MotorGestos(GESTOS_FILE)
+        self.seguidor_gestos = SeguidorGestos(ventana=5, minimo=3)
+
+        # Sin pipeline cuando el runtime asyncio maneja la inferencia
+        self.con_pipeline = con_pipeline
+        self.pipeline = None
+        self.planificador = PlanificadorAdaptativo()
+        # IDs estables entre inferencias; el login exige varias detecciones seguidas
+        self.rastreador_cajas = RastreadorCajas(min_aciertos=3)
+        self.detector_fuego = DetectorFuego(*ZONAS_FUEGO, escala=ESCALA_FUEGO)
+        self.seguidor_fuego = SeguidorFuego(self.detector_fuego)
 
         # ESTADO
         self.usuario_actual = "NADIE"
@@ -49,16 +71,69 @@ class SistemaSeguridad:
         self.ultimo_cambio_modo = 0
         
         self.frame_count = 0
+        self.t_captura = 0
+        self.latencia_decision = 0
         self.ultimas_cajas = []
         self.ultimo_resultado_manos = None
-        self.estado_fuego = [False, False, False]
+        self.estado_fuego = [False] * self.detector_fuego.num_zonas
+        self.reiniciar_fuego = False
         
         self.textos_manos = {'Right': "", 'Left': ""}
         self.mensaje_centro = "" 
         self.tiempo_mensaje = 0
 
+        self.cap = self.arranque.obtener("camara")
+        # Replay a máxima velocidad: todos los modelos en cada frame y sin descartes
+        self.determinista = getattr(self.cap, 'determinista', False)
+        if self.determinista:
+            self.modelos_listos(esperar=True)  # Reproducible desde el primer frame
+
+    def _crear_detector(self):
+        detector = DetectorRoboflow(MODELO_FILE, ETIQUETAS_MODELO)
+        detector.calentar(ANCHO_CAM, ALTO_CAM)  # La primera invocación no cae sobre un frame real
+        # Solo se invoca el modelo si la escena cambió desde la última inferencia.
+        # La antigüedad se mide con el t_captura de cada frame (lo pasa el pipeline)
+        return DetectorConCompuerta(detector)
+
+    def _crear_manos(self):
+        self.mp_hands = self.mp.solutions.hands
+        self.mp_draw = self.mp.solutions.drawing_utils
+        # Modo video: MediaPipe sigue cada mano con su propio ROI y solo
+        # vuelve a buscar palmas cuando pierde alguna
+        hands = self.mp_hands.Hands(
+            static_image_mode=False, max_num_hands=2,
+            model_complexity=0, min_detection_confidence=0.6, min_tracking_confidence=0.5
+        )
+        calentar_manos(hands, ANCHO_CAM, ALTO_CAM)
+        return hands
+
+    def modelos_listos(self, esperar=False):
+        """True cuando detector y manos cargaron y se calentaron (no bloquea salvo esperar=True)"""
+        if self.cerebro_ia is not None: return True
+        if self.error_modelos: return False
+        if esperar:
+            self.arranque.esperar()
+            # Sin modelos el replay determinista no sirve: se relanza el error
+            self.arranque.obtener("detector")
+            self.arranque.obtener("manos")
+        if not self.arranque.listo("detector", "manos"):
+            fallo = self.arranque.fallido("detector", "manos")
+            if fallo:
+                # Solo se transmite: el aviso queda en pantalla en vez de esperar para siempre
+                self.error_modelos = f"{fallo[0].upper()} FALLO: {fallo[1]}"[:60]
+                print(f"❌ [ARRANQUE] {fallo[0]} no cargó ({fallo[1]}). Sin reconocimiento de tarjetas ni manos.")
+            return False
+
+        self.cerebro_ia = self.arranque.obtener("detector")
+        self.hands = self.arranque.obtener("manos")
+        if self.con_pipeline:
+            # Tarjetas y manos en paralelo; la lógica corre al unir sus resultados
+            self.pipeline = PipelineInferencia(self.cerebro_ia, self.hands, logica=self.aplicar_resultado)
+        self.arranque.reporte()
+        return True
+
     def toggle_modo(self):
-        ahora = time.time()
+        ahora = self.t_captura
         if ahora - self.ultimo_cambio_modo > 2.0:
             self.modo_automatico = not self.modo_automatico
             self.ultimo_cambio_modo = ahora
@@ -70,13 +145,15 @@ class SistemaSeguridad:
             else:
                 print("\n🔄 CAMBIO A MODO: MANUAL (Control por Gestos)")
                 self.comms.enviar("MODO_MANUAL")
-                self.estado_fuego = [False, False, False]
+                self.estado_fuego = [False] * self.detector_fuego.num_zonas
+                # El seguidor se reinicia en el hilo principal (que es quien lo usa)
+                self.reiniciar_fuego = True
                 self.comms.enviar("PUÑO_CERRADO")
                 self.mostrar_mensaje("MODO MANUAL")
 
     def mostrar_mensaje(self, texto):
         self.mensaje_centro = texto
-        self.tiempo_mensaje = time.time()
+        self.tiempo_mensaje = self.t_captura
 
     def validar_y_enviar_manual(self, comando_intento):
         """Valida permisos y envía con log"""
@@ -94,146 +171,232 @@ class SistemaSeguridad:
             return False
 
     def procesar_zonas_fuego(self, frame):
-        alto, ancho, _ = frame.shape
-        tercio = ancho // 3
-        zonas = [frame[:, 0:tercio], frame[:, tercio:2*tercio], frame[:, 2*tercio:]]
-        coords_x = [0, tercio, 2*tercio]
-
-        for i, roi in enumerate(zonas):
-            hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-            mask = cv2.inRange(hsv, np.array([18, 50, 50]), np.array([35, 255, 255]))
-            hay_fuego = cv2.countNonZero(mask) > 2000
+        if self.reiniciar_fuego:
+            self.seguidor_fuego.reiniciar()
+            self.reiniciar_fuego = False
 
-            if hay_fuego and not self.estado_fuego[i]:
+        # Solo transiciones confirmadas por la histéresis del seguidor
+        for i, encendido in self.seguidor_fuego.actualizar(frame):
+            if encendido:
                 cmd = f"FUEGO_{i+1}_ON"
                 print(f"🔥 ¡ALERTA! Enviando a Pico 2W: {cmd}") # Log de Fuego
-                self.comms.enviar(cmd)
-                self.estado_fuego[i] = True
-            elif not hay_fuego and self.estado_fuego[i]:
+            else:
                 cmd = f"FUEGO_{i+1}_OFF"
                 print(f"💨 Fuego extinguido. Enviando: {cmd}") # Log de apagado
-                self.comms.enviar(cmd)
-                self.estado_fuego[i] = False
+            self.comms.enviar(cmd)
+        self.estado_fuego = self.seguidor_fuego.estados
+
+    def dibujar_zonas_fuego(self, frame):
+        alto, ancho, _ = frame.shape
+
+        for i, (x0, y0, x1, y1) in enumerate(self.detector_fuego.rectangulos(alto, ancho)):
+            cv2.rectangle(frame, (x0, y0), (x1, y1), (200, 200, 200), 2)
 
             if self.estado_fuego[i]:
-                cv2.rectangle(frame, (coords_x[i], 0), (coords_x[i]+tercio, alto), (0, 0, 255), 5)
-                cv2.putText(frame, f"FUEGO Z{i+1}", (coords_x[i]+10, alto//2), 1, 2, (0,0,255), 3)
+                cv2.rectangle(frame, (x0, y0), (x1, y1), (0, 0, 255), 5)
+                cv2.putText(frame, f"FUEGO Z{i+1}", (x0+10, (y0+y1)//2), 1, 2, (0,0,255), 3)
+
+    def aplicar_resultado(self, res):
+        """Lógica de decisión: se ejecuta en el hilo de unión del pipeline"""
+        for tarea in res.tareas:
+            # Cajas repetidas por la compuerta: su tiempo no es el costo del modelo
+            if tarea == "tarjetas" and not res.cajas_frescas: continue
+            self.planificador.registrar(tarea, res.tiempos[tarea])
+
+        # A. Tarjetas
+        if "tarjetas" in res.tareas:
+            self.ultimas_cajas = res.cajas
+            self.planificador.notificar("tarjetas", len(res.cajas) > 0)
+            # Solo una inferencia real cuenta como acierto: repetir las cajas de la
+            # compuerta confirmaría una detección espuria sin volver a verla
+            if res.cajas_frescas:
+                self.procesar_tarjetas(self.rastreador_cajas.actualizar(res.cajas, res.t_captura))
+                # Una pista se borra tras max_perdidos inferencias sin verla: con la
+                # escena quieta no se espera a max_antiguedad de la compuerta
+                if self.rastreador_cajas.con_perdidos():
+                    self.cerebro_ia.invalidar()
+
+        # B. Manos
+        if "manos" in res.tareas:
+            self.ultimo_resultado_manos = res.manos
+            self.planificador.notificar("manos", res.manos and res.manos.multi_hand_landmarks)
+            self.procesar_manos()
+
+    def procesar_tarjetas(self, confirmadas):
+        for clase in confirmadas['clase']:
+            nombre = self.cerebro_ia.etiquetas[clase]
+            if "Maestro" in nombre: self.usuario_actual = "MAESTRO"
+            elif "Jefe" in nombre: self.usuario_actual = "JEFE"
+            elif "Empleado" in nombre: self.usuario_actual = "EMPLEADO"
             
-            cv2.line(frame, (coords_x[i], 0), (coords_x[i], alto), (200, 200, 200), 2)
+            if not self.modo_automatico:
+                letra = nombre.split("_")[-1]
+                if letra in ["L", "O", "V"]: 
+                    print(f"🚀 Enviando a Pico 2W (Tarjeta): {letra}") # Log Tarjeta
+                    self.comms.enviar(letra)
+
+    def procesar_manos(self):
+        # Cada mano se convierte una vez a array; los gestos salen del motor compilado
+        puntos, etiquetas = manos.apilar_manos(self.ultimo_resultado_manos)
+        gestos = {}
+        if etiquetas:
+            mascaras = manos.analizar_dedos_lote(puntos, etiquetas)
+            gestos = dict(zip(etiquetas, self.motor_gestos.clasificar(puntos, etiquetas, mascaras)))
+
+        # Solo actúan los gestos confirmados por el seguidor (N de M frames)
+        for label in ('Right', 'Left'):
+            gesto = gestos.get(label)
+            for evento, confirmado in self.seguidor_gestos.actualizar(label, gesto, self.t_captura):
+                if evento == 'PRESIONADO':
+                    self.ejecutar_gesto(label, confirmado)
+                elif evento == 'LIBERADO':
+                    self.textos_manos[label] = ""
+
+    def ejecutar_gesto(self, label, gesto):
+        """Acción de un gesto recién confirmado"""
+        # Cambio Modo
+        if gesto == "CAMBIO_MODO":
+            self.toggle_modo()
+        
+        # Modo Manual
+        elif not self.modo_automatico:
+            if label == 'Right': # Números
+                if gesto == "PUÑO_CERRADO":
+                    self.textos_manos['Right'] = "#0"
+                    self.comms.enviar("PUÑO_CERRADO")
+                else:
+                    self.textos_manos['Right'] = f"#{gesto.replace('NUMERO_', '')}"
+                    if not self.validar_y_enviar_manual(gesto):
+                        self.textos_manos['Right'] += " (X)"
+
+            elif label == 'Left': # Letras
+                txt = gesto.split("_")[1]
+                self.textos_manos['Left'] = f"{txt}"
+                if not self.validar_y_enviar_manual(txt):
+                    self.textos_manos['Left'] += " (X)"
 
     def procesar(self):
         print("✅ Sistema Listo. Esperando input...")
         
         while True:
-            ret, frame = self.cap.read()
+            ret, frame, self.t_captura = self.cap.leer()
             if not ret: break
             
             frame = cv2.flip(frame, 1)
             self.frame_count += 1
             
-            # --- LÓGICA (1 de cada 3 frames) ---
-            if self.frame_count % 3 == 0:
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # A. Tarjetas
-                self.ultimas_cajas = self.cerebro_ia.detectar(rgb_frame)
-                for (_, nombre, _) in self.ultimas_cajas:
-                    if "Maestro" in nombre: self.usuario_actual = "MAESTRO"
-                    elif "Jefe" in nombre: self.usuario_actual = "JEFE"
-                    elif "Empleado" in nombre: self.usuario_actual = "EMPLEADO"
-                    
-                    if not self.modo_automatico:
-                        letra = nombre.split("_")[-1]
-                        if letra in ["L", "O", "V"]: 
-                            print(f"🚀 Enviando a Pico 2W (Tarjeta): {letra}") # Log Tarjeta
-                            self.comms.enviar(letra)
-
-                # B. Manos
-                self.ultimo_resultado_manos = self.hands.process(rgb_frame)
-                
-                if not self.ultimo_resultado_manos or not self.ultimo_resultado_manos.multi_hand_landmarks:
-                    self.textos_manos = {'Right': "", 'Left': ""}
-                else:
-                    for landmarks, handedness in zip(self.ultimo_resultado_manos.multi_hand_landmarks, self.ultimo_resultado_manos.multi_handedness):
-                        label = handedness.classification[0].label
-                        dedos = manos.analizar_dedos(landmarks.landmark, label)
-                        
-                        # Cambio Modo
-                        if dedos == [1, 1, 0, 0, 1]:
-                            self.toggle_modo()
-                        
-                        # Modo Manual
-                        elif not self.modo_automatico:
-                            if label == 'Right': # Números
-                                cant = sum(dedos)
-                                self.textos_manos['Right'] = f"#{cant}"
-                                if cant > 0: 
-                                    if not self.validar_y_enviar_manual(f"NUMERO_{cant}"):
-                                        self.textos_manos['Right'] += " (X)"
-                                else: 
-                                    # Evitar spam de puño cerrado en consola
-                                    self.comms.enviar("PUÑO_CERRADO")
-
-                            elif label == 'Left': # Letras
-                                letra = manos.identificar_letra_mano(dedos, landmarks.landmark)
-                                if letra: 
-                                    txt = letra.split("_")[1]
-                                    self.textos_manos['Left'] = f"{txt}"
-                                    if not self.validar_y_enviar_manual(txt):
-                                        self.textos_manos['Left'] += " (X)"
-                                else:
-                                    self.textos_manos['Left'] = "..."
+            # --- LÓGICA (El planificador elige qué modelos corren en este frame) ---
+            if not self.modelos_listos():
+                res = None  # Modelos cargando en segundo plano: solo se transmite
+            elif self.determinista:
+                self.pipeline.enviar(frame, self.t_captura, TAREAS_TODAS)
+                res = self.pipeline.esperar_resultado()
+            else:
+                if not self.pipeline.ocupado():
+                    tareas = self.planificador.decidir(frame)
+                    self.pipeline.enviar(frame, self.t_captura, tareas)
+                res = self.pipeline.obtener_resultado()
+            if res:
+                self.latencia_decision = time.time() - res.t_captura
 
             # --- AUTO (Fuego) ---
             if self.modo_automatico:
                 self.procesar_zonas_fuego(frame)
-                cv2.putText(frame, "MODO AUTOMATICO (FUEGO)", (10, 460), 1, 2, (0, 0, 255), 3)
-            else:
-                cv2.putText(frame, "MANUAL", (10, 460), 1, 2, (255, 255, 0), 3)
 
-            # --- DIBUJADO ---
-            col = (0,255,255) 
-            if self.usuario_actual=="MAESTRO": col=(0,255,0)
-            elif self.usuario_actual=="JEFE": col=(0,165,255)
-            elif self.usuario_actual=="EMPLEADO": col=(255,0,255)
-            
-            cv2.rectangle(frame, (0,0), (640,50), (0,0,0), -1)
-            cv2.putText(frame, f"USUARIO: {self.usuario_actual}", (20,35), 1, 1, col, 2)
-
-            for (box, nombre, score) in self.ultimas_cajas:
-                ymin, xmin, ymax, xmax = box
-                start = (int(xmin * ANCHO_CAM), int(ymin * ALTO_CAM))
-                end = (int(xmax * ANCHO_CAM), int(ymax * ALTO_CAM))
-                cv2.rectangle(frame, start, end, col, 3)
-                cv2.putText(frame, nombre.split("_")[-1], (start[0], start[1]-10), 1, 1, col, 2)
-
-            if self.ultimo_resultado_manos and self.ultimo_resultado_manos.multi_hand_landmarks:
-                for landmarks, handedness in zip(self.ultimo_resultado_manos.multi_hand_landmarks, 
-                                               self.ultimo_resultado_manos.multi_handedness):
-                    self.mp_draw.draw_landmarks(frame, landmarks, self.mp_hands.HAND_CONNECTIONS)
-                    lbl = handedness.classification[0].label
-                    coord = (int(landmarks.landmark[0].x * ANCHO_CAM), int(landmarks.landmark[0].y * ALTO_CAM))
-                    txt = self.textos_manos.get(lbl, "")
-                    color_txt = (0, 255, 0) if "(X)" not in txt else (0, 0, 255)
-                    cv2.putText(frame, txt, (coord[0]-50, coord[1]-30), 1, 1.5, color_txt, 3)
-
-            if time.time() - self.tiempo_mensaje < 2.0:
-                textSize = cv2.getTextSize(self.mensaje_centro, 1, 2, 3)[0]
-                textX = (frame.shape[1] - textSize[0]) // 2
-                textY = (frame.shape[0] + textSize[1]) // 2
-                cv2.putText(frame, self.mensaje_centro, (textX, textY), 1, 2, (0,0,255), 4)
-
-            cv2.imshow('PiArchitect Final', frame)
-            if cv2.waitKey(1) & 0xFF == ord('q'): break
+            # --- DIBUJADO (Según la salida: nada, ventana o archivo) ---
+            if not self.salida.presentar(frame, self.dibujar): break
+
+    def dibujar(self, frame):
+        """Overlay de estado; la salida decide si y en qué hilo se ejecuta"""
+        if self.modo_automatico:
+            self.dibujar_zonas_fuego(frame)
+            cv2.putText(frame, "MODO AUTOMATICO (FUEGO)", (10, 460), 1, 2, (0, 0, 255), 3)
+        else:
+            cv2.putText(frame, "MANUAL", (10, 460), 1, 2, (255, 255, 0), 3)
+
+        col = (0,255,255) 
+        if self.usuario_actual=="MAESTRO": col=(0,255,0)
+        elif self.usuario_actual=="JEFE": col=(0,165,255)
+        elif self.usuario_actual=="EMPLEADO": col=(255,0,255)
+        
+        cv2.rectangle(frame, (0,0), (640,50), (0,0,0), -1)
+        cv2.putText(frame, f"USUARIO: {self.usuario_actual}", (20,35), 1, 1, col, 2)
+        if self.error_modelos:
+            cv2.putText(frame, self.error_modelos, (10, 420), 1, 1.2, (0, 0, 255), 2)
+
+        # Cajas interpoladas al frame actual (el detector no corre en todos)
+        for pista in self.rastreador_cajas.predecir(self.t_captura):
+            nombre = self.cerebro_ia.etiquetas[pista['clase']]
+            ymin, xmin, ymax, xmax = pista['caja']
+            start = (int(xmin * ANCHO_CAM), int(ymin * ALTO_CAM))
+            end = (int(xmax * ANCHO_CAM), int(ymax * ALTO_CAM))
+            cv2.rectangle(frame, start, end, col, 3)
+            cv2.putText(frame, f"{nombre.split('_')[-1]} #{pista['id']}", (start[0], start[1]-10), 1, 1, col, 2)
+
+        # Copia local: el hilo del pipeline puede reemplazarlo mientras se dibuja
+        resultado_manos = self.ultimo_resultado_manos
+        if resultado_manos and resultado_manos.multi_hand_landmarks:
+            for landmarks, handedness in zip(resultado_manos.multi_hand_landmarks, 
+                                           resultado_manos.multi_handedness):
+                self.mp_draw.draw_landmarks(frame, landmarks, self.mp_hands.HAND_CONNECTIONS)
+                lbl = handedness.classification[0].label
+                coord = (int(landmarks.landmark[0].x * ANCHO_CAM), int(landmarks.landmark[0].y * ALTO_CAM))
+                txt = self.textos_manos.get(lbl, "")
+                color_txt = (0, 255, 0) if "(X)" not in txt else (0, 0, 255)
+                cv2.putText(frame, txt, (coord[0]-50, coord[1]-30), 1, 1.5, color_txt, 3)
+
+        if self.t_captura - self.tiempo_mensaje < 2.0:
+            textSize = cv2.getTextSize(self.mensaje_centro, 1, 2, 3)[0]
+            textX = (frame.shape[1] - textSize[0]) // 2
+            textY = (frame.shape[0] + textSize[1]) // 2
+            cv2.putText(frame, self.mensaje_centro, (textX, textY), 1, 2, (0,0,255), 4)
 
     def cerrar(self):
+        if self.pipeline: self.pipeline.cerrar()
         self.cap.release()
+        self.arranque.cerrar()
         self.comms.cerrar()
-        cv2.destroyAllWindows()
+        self.salida.cerrar()
 
 if __name__ == "__main__":
-    app = SistemaSeguridad()
+    parser = argparse.ArgumentParser(description="PiArchitect - Sistema Final")
+    parser.add_argument("--salida", choices=["ninguna", "ventana", "mjpeg"], default="ventana",
+                        help="'ninguna' para equipos headless")
+    parser.add_argument("--archivo", default="salida.avi", help="Destino del modo mjpeg")
+    parser.add_argument("--fps-render", type=float, default=None, help="Límite de FPS del dibujado")
+    parser.add_argument("--grabar", metavar="DIR", help="Grabar los frames de la cámara en DIR")
+    parser.add_argument("--replay", metavar="DIR", help="Reproducir una grabación en lugar de la cámara")
+    parser.add_argument("--max-velocidad", action="store_true", help="Replay sin esperas (determinista)")
+    parser.add_argument("--registro-uart", metavar="ARCHIVO", help="Guardar los comandos UART (JSON por línea)")
+    parser.add_argument("--async", dest="usar_async", action="store_true",
+                        help="Runtime asyncio (serial, captura e inferencia en un solo event loop)")
+    parser.add_argument("--pty", action="store_true",
+                        help="Con --async: pty local para emulador_pico.py --ruta en vez del puerto serie")
+    parser.add_argument("--depurar-loop", action="store_true", help="Avisar callbacks lentos del event loop")
+    args = parser.parse_args()
+
+    fuente = None
+    if args.replay:
+        fuente = FuenteReplay(args.replay, tiempo_real=not args.max_velocidad)
+    elif args.grabar:
+        fuente = FuenteGrabada(CapturaCamara(0, ANCHO_CAM, ALTO_CAM), args.grabar)
+
+    salida = crear_salida(args.salida, 'PiArchitect Final', args.archivo, args.fps_render)
+    if args.usar_async:
+        import runtime_async
+        t_ref = {}  # t_captura del sistema, que todavía no existe al crear comms
+        comms = runtime_async.GestorSerialAsync(registro=args.registro_uart, pty=args.pty,
+                                                reloj=lambda: t_ref["app"].t_captura)
+        app = SistemaSeguridad(salida, fuente, comms=comms, con_pipeline=False)
+        t_ref["app"] = app
+    else:
+        app = SistemaSeguridad(salida, fuente, args.registro_uart)
     try:
-        app.procesar()
+        if args.usar_async:
+            runtime_async.ejecutar(app, depurar=args.depurar_loop)
+        else:
+            app.procesar()
     except KeyboardInterrupt:
+        pass
+    finally:
         app.cerrar()
\ No newline at end of file
@@ -1,6 +1,7 @@
 import cv2
 import mediapipe as mp
 import platform
+import threading
 import time
 import socket
 import numpy as np
@@ -8,7 +9,10 @@ import math
 
 # --- IMPORTACIÓN DE MÓDULOS ---
 from comunicacion import GestorSerial
-from detector_ia import DetectorRoboflow
+from captura import CapturaCamara
+from planificador import PlanificadorAdaptativo
+from detector_ia import DetectorRoboflow, DetectorConCompuerta
+from rastreador_cajas import RastreadorCajas
 import logica_manos as manos
 
 # --- 1. CONFIGURACIÓN DE ROLES Y PERMISOS ---
@@ -32,15 +36,13 @@ class SistemaSeguridad:
         
         # 1. Hardware y Módulos
         self.comms = GestorSerial()
-        self.cerebro_ia = DetectorRoboflow(MODELO_FILE, ETIQUETAS_MODELO)
+        # Solo se invoca el modelo si la escena cambió desde la última inferencia
+        self.cerebro_ia = DetectorConCompuerta(DetectorRoboflow(MODELO_FILE, ETIQUETAS_MODELO))
+        # Calentamiento en segundo plano: hasta que termine no se detectan tarjetas
+        threading.Thread(target=self.cerebro_ia.calentar, daemon=True).start()
         
         # 2. Cámara
-        if platform.system() == 'Windows':
-            self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-        else:
-            self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, ANCHO_CAM)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, ALTO_CAM)
+        self.cap = CapturaCamara(0, ANCHO_CAM, ALTO_CAM)
 
         # 3. Mediapipe
         self.mp_hands = mp.solutions.hands
@@ -49,12 +51,15 @@ class SistemaSeguridad:
             model_complexity=0, min_detection_confidence=0.5, min_tracking_confidence=0.5
         )
         self.mp_draw = mp.solutions.drawing_utils
+        self.planificador = PlanificadorAdaptativo()
+        self.rastreador_cajas = RastreadorCajas(min_aciertos=3)
 
         # 4. ESTADO DEL SISTEMA
         self.usuario_actual = "NADIE"
         self.ultimo_cambio_usuario = 0
         
         self.frame_count = 0
+        self.t_captura = 0
         self.ultimas_cajas = []
         self.ultimo_resultado_manos = None
         
@@ -62,9 +67,10 @@ class SistemaSeguridad:
         self.textos_manos = {'Right': "", 'Left': ""} 
         self.mensaje_estado = "" 
 
-    def actualizar_rol(self, detecciones):
-        """Actualiza el usuario si se detecta una tarjeta"""
-        for (_, nombre_etiqueta, _) in detecciones:
+    def actualizar_rol(self, confirmadas):
+        """Actualiza el usuario con las tarjetas confirmadas por el rastreador"""
+        for clase in confirmadas['clase']:
+            nombre_etiqueta = self.cerebro_ia.etiquetas[clase]
             nuevo_rol = None
             
             if "Maestro" in nombre_etiqueta: nuevo_rol = "MAESTRO"
@@ -94,55 +100,67 @@ class SistemaSeguridad:
         print("✅ Sistema Listo. Muestra tarjeta para login.")
         
         while True:
-            ret, frame = self.cap.read()
+            ret, frame, self.t_captura = self.cap.leer()
             if not ret: break
             
             frame = cv2.flip(frame, 1)
             self.frame_count += 1
             
-            # --- LÓGICA (1 de cada 3 frames) ---
-            if self.frame_count % 3 == 0:
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
+            # --- LÓGICA (El planificador decide qué modelos corren) ---
+            tareas = self.planificador.decidir(frame)
+            if tareas:
                 # A. Detectar Tarjetas (Login)
-                self.ultimas_cajas = self.cerebro_ia.detectar(rgb_frame)
-                self.actualizar_rol(self.ultimas_cajas)
+                if "tarjetas" in tareas and self.cerebro_ia.listo.is_set():
+                    t0 = time.perf_counter()
+                    self.ultimas_cajas, fresca = self.cerebro_ia.evaluar(frame, True, self.t_captura)
+                    # Cajas repetidas por la compuerta: ni miden el costo del modelo ni
+                    # cuentan como otro acierto para confirmar el login
+                    if fresca:
+                        self.planificador.registrar("tarjetas", time.perf_counter() - t0)
+                        self.actualizar_rol(self.rastreador_cajas.actualizar(self.ultimas_cajas, self.t_captura))
+                        if self.rastreador_cajas.con_perdidos():
+                            self.cerebro_ia.invalidar()  # Borrar pronto la tarjeta que ya no está
                 
                 # B. Detectar Manos (Intención)
-                self.ultimo_resultado_manos = self.hands.process(rgb_frame)
-
-                # C. Procesar Intenciones
-                self.mensaje_estado = "" 
+                if "manos" in tareas:
+                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    t0 = time.perf_counter()
+                    self.ultimo_resultado_manos = self.hands.process(rgb_frame)
+                    self.planificador.registrar("manos", time.perf_counter() - t0)
+                    self.planificador.notificar("manos", self.ultimo_resultado_manos.multi_hand_landmarks)
+
+                    # C. Procesar Intenciones
+                    self.mensaje_estado = "" 
                 
-                # Si no hay manos, limpiamos los textos
-                if not self.ultimo_resultado_manos or not self.ultimo_resultado_manos.multi_hand_landmarks:
-                    self.textos_manos = {'Right': "", 'Left': ""}
-                else:
-                    for landmarks, handedness in zip(self.ultimo_resultado_manos.multi_hand_landmarks, 
-                                                   self.ultimo_resultado_manos.multi_handedness):
+                    # Si no hay manos, limpiamos los textos
+                    if not self.ultimo_resultado_manos or not self.ultimo_resultado_manos.multi_hand_landmarks:
+                        self.textos_manos = {'Right': "", 'Left': ""}
+                    else:
+                        for landmarks, handedness in zip(self.ultimo_resultado_manos.multi_hand_landmarks, 
+                                                       self.ultimo_resultado_manos.multi_handedness):
                         
-                        label = handedness.classification[0].label
-                        dedos = manos.analizar_dedos(landmarks.landmark, label)
-                        comando_candidato = None
-
-                        # Interpretar Gesto y GUARDAR TEXTO VISUAL
-                        if label == 'Right': # Mano Izq Física -> Números
-                            cant = sum(dedos)
-                            self.textos_manos['Right'] = f"Num: {cant}" # <--- Feedback Visual
-                            if cant > 0: comando_candidato = f"NUMERO_{cant}"
+                            label = handedness.classification[0].label
+                            dedos = manos.analizar_dedos(landmarks.landmark, label)
+                            comando_candidato = None
+
+                            # Interpretar Gesto y GUARDAR TEXTO VISUAL
+                            if label == 'Right': # Mano Izq Física -> Números
+                                cant = sum(dedos)
+                                self.textos_manos['Right'] = f"Num: {cant}" # <--- Feedback Visual
+                                if cant > 0: comando_candidato = f"NUMERO_{cant}"
                         
-                        elif label == 'Left': # Mano Der Física -> Letras
-                            letra = manos.identificar_letra_mano(dedos, landmarks.landmark)
-                            if letra: 
-                                limpio = letra.split("_")[1]
-                                self.textos_manos['Left'] = f"Letra: {limpio}" # <--- Feedback Visual
-                                comando_candidato = limpio
-                            else:
-                                self.textos_manos['Left'] = "..."
-
-                        # VALIDACIÓN DE SEGURIDAD (Solo si hay un gesto válido)
-                        if comando_candidato:
-                            self.mensaje_estado = self.validar_y_enviar(comando_candidato)
+                            elif label == 'Left': # Mano Der Física -> Letras
+                                letra = manos.identificar_letra_mano(dedos, landmarks.landmark)
+                                if letra: 
+                                    limpio = letra.split("_")[1]
+                                    self.textos_manos['Left'] = f"Letra: {limpio}" # <--- Feedback Visual
+                                    comando_candidato = limpio
+                                else:
+                                    self.textos_manos['Left'] = "..."
+
+                            # VALIDACIÓN DE SEGURIDAD (Solo si hay un gesto válido)
+                            if comando_candidato:
+                                self.mensaje_estado = self.validar_y_enviar(comando_candidato)
 
             # --- DIBUJADO VISUAL (Siempre) ---
             
@@ -157,8 +175,9 @@ class SistemaSeguridad:
                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, color_ui, 2)
 
             # 2. Tarjetas detectadas
-            for (box, nombre, score) in self.ultimas_cajas:
-                ymin, xmin, ymax, xmax = box
+            for pista in self.rastreador_cajas.predecir(self.t_captura):
+                nombre = f"{self.cerebro_ia.etiquetas[pista['clase']]} #{pista['id']}"
+                ymin, xmin, ymax, xmax = pista['caja']
                 start = (int(xmin * ANCHO_CAM), int(ymin * ALTO_CAM))
                 end = (int(xmax * ANCHO_CAM), int(ymax * ALTO_CAM))
                 cv2.rectangle(frame, start, end, color_ui, 2)
@@ -0,0 +1,99 @@
+import cv2
+import platform
+import time
+
+# --- IMPORTACIÓN DE MÓDULOS ---
+from captura import CapturaCamara
+from detector_ia import DetectorRoboflow
+
+# --- CONFIGURACIÓN ---
+ETIQUETAS_MODELO = ["Tarjeta_Maestro", "Tarjeta_Jefe", "Tarjeta_Empleado"]
+MODELO_FILE = "modelo_tarjetas.tflite"
+CAMARAS = [0, 1]              # Índices de cv2.VideoCapture
+ANCHO_CAM, ALTO_CAM = 640, 480
+TIEMPO_SESION = 10.0          # Segundos sin tarjeta antes de cerrar sesión
+
+class EstadoCamara:
+    """Máquina de estados de acceso de un punto de control (una cámara)"""
+    def __init__(self, indice):
+        self.indice = indice
+        self.usuario_actual = "NADIE"
+        self.ultima_tarjeta = 0
+        self.ultimas_cajas = []
+
+    def actualizar(self, detecciones, etiquetas):
+        ahora = time.time()
+        self.ultimas_cajas = detecciones
+
+        for (_, clase, _) in detecciones:
+            nombre = etiquetas[clase]
+            nuevo_rol = None
+            if "Maestro" in nombre: nuevo_rol = "MAESTRO"
+            elif "Jefe" in nombre: nuevo_rol = "JEFE"
+            elif "Empleado" in nombre: nuevo_rol = "EMPLEADO"
+
+            if nuevo_rol:
+                self.ultima_tarjeta = ahora
+                if nuevo_rol != self.usuario_actual:
+                    self.usuario_actual = nuevo_rol
+                    print(f"🔐 [CAM {self.indice}] CAMBIO DE USUARIO: {self.usuario_actual}")
+
+        # Cierre de sesión por inactividad
+        if self.usuario_actual != "NADIE" and ahora - self.ultima_tarjeta > TIEMPO_SESION:
+            print(f"🔓 [CAM {self.indice}] Sesión cerrada ({self.usuario_actual})")
+            self.usuario_actual = "NADIE"
+
+class SistemaMulticamara:
+    def __init__(self):
+        print(f"🚀 Iniciando Control de Acceso Multicámara ({len(CAMARAS)} cámaras) en {platform.system()}")
+
+        self.cerebro_ia = DetectorRoboflow(MODELO_FILE, ETIQUETAS_MODELO)
+        # Un solo invoke() para todas las cámaras si el modelo lo permite
+        self.cerebro_ia.configurar_lote(len(CAMARAS))
+
+        self.caps = [CapturaCamara(i, ANCHO_CAM, ALTO_CAM) for i in CAMARAS]
+        self.estados = [EstadoCamara(i) for i in CAMARAS]
+
+    def procesar(self):
+        print("✅ Sistema Listo. Muestra tarjeta en cualquier cámara.")
+
+        while True:
+            frames = []
+            for cap in self.caps:
+                ret, frame, _ = cap.leer()
+                if not ret: return
+                # Copia: el buffer de captura se reutiliza en la siguiente lectura
+                frames.append(cv2.flip(frame, 1))
+
+            # --- LÓGICA (Lote o turnos según el modelo) ---
+            resultados = self.cerebro_ia.detectar_lote(frames, es_bgr=True)
+            for estado, detecciones in zip(self.estados, resultados):
+                if detecciones is not None:
+                    estado.actualizar(detecciones, self.cerebro_ia.etiquetas)
+
+            # --- DIBUJADO ---
+            for estado, frame in zip(self.estados, frames):
+                for (box, clase, score) in estado.ultimas_cajas:
+                    ymin, xmin, ymax, xmax = box
+                    start = (int(xmin * ANCHO_CAM), int(ymin * ALTO_CAM))
+                    end = (int(xmax * ANCHO_CAM), int(ymax * ALTO_CAM))
+                    cv2.rectangle(frame, start, end, (0, 255, 0), 2)
+
+                cv2.rectangle(frame, (0, 0), (640, 40), (50, 50, 50), -1)
+                cv2.putText(frame, f"CAM {estado.indice} USUARIO: {estado.usuario_actual}", (10, 30),
+                          cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+                cv2.imshow(f'PiArchitect - Camara {estado.indice}', frame)
+
+            if cv2.waitKey(1) & 0xFF == ord('q'): break
+
+    def cerrar(self):
+        for cap in self.caps:
+            cap.release()
+        cv2.destroyAllWindows()
+
+if __name__ == "__main__":
+    app = SistemaMulticamara()
+    try:
+        app.procesar()
+    finally:
+        app.cerrar()
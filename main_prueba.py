@@ -8,6 +8,11 @@ import serial
 import threading
 import queue
 
+import protocolo
+
+from captura import CapturaCamara
+from planificador import PlanificadorAdaptativo
+
 # --- 1. CONFIGURACIÓN ---
 SISTEMA = platform.system()
 print(f"⚙️ PiArchitect: Sistema Final con Log de Envío en {SISTEMA}")
@@ -45,14 +50,16 @@ def worker_serial():
     except Exception as e:
         print(f"⚠️ [HARDWARE] Puerto serial no disponible ({e}). Modo Simulación.")
 
+    seq = 0
     while True:
         comando = cola_mensajes.get()
         if comando == "SALIR": break
         
         if ser and ser.is_open:
             try:
-                msg = f"{comando}\n"
-                ser.write(msg.encode('utf-8'))
+                # Sin seguimiento de ACK, pero con SEQ distinto: la Pico ignora un SEQ repetido
+                ser.write(protocolo.empaquetar([protocolo.codificar_comando(comando)], seq))
+                seq = (seq + 1) % protocolo.SEQ_DESCONOCIDO
             except: pass
         
         # (Opcional) Si quieres ver también cuando el hilo físico lo procesa:
@@ -109,13 +116,7 @@ def identificar_letra_mano(dedos, landmarks):
 class SistemaVigilancia:
     def __init__(self):
         print("🎥 Iniciando cámara...")
-        if SISTEMA == 'Windows':
-            self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-        else:
-            self.cap = cv2.VideoCapture(0)
-            
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, ANCHO_CAM)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, ALTO_CAM)
+        self.cap = CapturaCamara(0, ANCHO_CAM, ALTO_CAM)
         
         self.mp_hands = mp.solutions.hands
         self.hands = self.mp_hands.Hands(
@@ -126,6 +127,7 @@ class SistemaVigilancia:
             min_tracking_confidence=0.5
         )
         self.mp_draw = mp.solutions.drawing_utils
+        self.planificador = PlanificadorAdaptativo()
 
         self.interpreter = None
         if TFLITE_AVAILABLE:
@@ -171,46 +173,54 @@ class SistemaVigilancia:
     def procesar(self):
         print("✅ Bucle principal iniciado. Observa la consola para ver envíos.")
         while True:
-            ret, frame = self.cap.read()
+            ret, frame, t_captura = self.cap.leer()
             if not ret: break
             
             frame = cv2.flip(frame, 1)
             self.frame_count += 1
             
-            # --- LÓGICA (1 de cada 3 frames) ---
-            if self.frame_count % 3 == 0:
+            # --- LÓGICA (Planificador adaptativo) ---
+            tareas = self.planificador.decidir(frame)
+            if tareas:
                 rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 
                 # 1. IA Tarjetas
-                self.ultimas_cajas = self.detectar_tarjetas(rgb_frame)
+                if "tarjetas" in tareas:
+                    t0 = time.perf_counter()
+                    self.ultimas_cajas = self.detectar_tarjetas(rgb_frame)
+                    self.planificador.registrar("tarjetas", time.perf_counter() - t0)
                 
                 # 2. Manos
-                self.ultimo_resultado_manos = self.hands.process(rgb_frame)
-
-                if not self.ultimo_resultado_manos or not self.ultimo_resultado_manos.multi_hand_landmarks:
-                    self.textos_manos = {'Right': "", 'Left': ""}
-                else:
-                    for landmarks, handedness in zip(self.ultimo_resultado_manos.multi_hand_landmarks, 
-                                                   self.ultimo_resultado_manos.multi_handedness):
-                        label = handedness.classification[0].label
-                        dedos = analizar_dedos(landmarks.landmark, label)
+                if "manos" in tareas:
+                    t0 = time.perf_counter()
+                    self.ultimo_resultado_manos = self.hands.process(rgb_frame)
+                    self.planificador.registrar("manos", time.perf_counter() - t0)
+                    self.planificador.notificar("manos", self.ultimo_resultado_manos.multi_hand_landmarks)
+
+                    if not self.ultimo_resultado_manos or not self.ultimo_resultado_manos.multi_hand_landmarks:
+                        self.textos_manos = {'Right': "", 'Left': ""}
+                    else:
+                        for landmarks, handedness in zip(self.ultimo_resultado_manos.multi_hand_landmarks, 
+                                                       self.ultimo_resultado_manos.multi_handedness):
+                            label = handedness.classification[0].label
+                            dedos = analizar_dedos(landmarks.landmark, label)
                         
-                        # Lógica Izq (Números)
-                        if label == 'Right':
-                            cant = sum(dedos)
-                            self.textos_manos['Right'] = f"Num: {cant}"
-                            if cant > 0: poner_en_cola(f"NUMERO_{cant}")
-                            else: poner_en_cola("PUÑO_CERRADO")
+                            # Lógica Izq (Números)
+                            if label == 'Right':
+                                cant = sum(dedos)
+                                self.textos_manos['Right'] = f"Num: {cant}"
+                                if cant > 0: poner_en_cola(f"NUMERO_{cant}")
+                                else: poner_en_cola("PUÑO_CERRADO")
                         
-                        # Lógica Der (Letras)
-                        elif label == 'Left':
-                            letra = identificar_letra_mano(dedos, landmarks.landmark)
-                            if letra:
-                                txt = letra.split("_")[1]
-                                self.textos_manos['Left'] = f"Letra: {txt}"
-                                poner_en_cola(txt)
-                            else:
-                                self.textos_manos['Left'] = "..."
+                            # Lógica Der (Letras)
+                            elif label == 'Left':
+                                letra = identificar_letra_mano(dedos, landmarks.landmark)
+                                if letra:
+                                    txt = letra.split("_")[1]
+                                    self.textos_manos['Left'] = f"Letra: {txt}"
+                                    poner_en_cola(txt)
+                                else:
+                                    self.textos_manos['Left'] = "..."
 
             # --- DIBUJADO ---
             for (box, nombre, score) in self.ultimas_cajas:
@@ -1,10 +1,14 @@
 import cv2
 import mediapipe as mp
 import platform
+import threading
+import time
 
 # --- IMPORTACIÓN DE NUESTROS MÓDULOS ---
 from comunicacion import GestorSerial
-from detector_ia import DetectorRoboflow
+from captura import CapturaCamara
+from planificador import PlanificadorAdaptativo
+from detector_ia import DetectorRoboflow, DetectorConCompuerta
 import logica_manos as manos
 
 # --- CONFIGURACIÓN ---
@@ -18,15 +22,12 @@ def main():
     
     # 1. Inicializar Módulos
     comms = GestorSerial()
-    cerebro_ia = DetectorRoboflow(MODELO_FILE, ETIQUETAS_MODELO)
+    cerebro_ia = DetectorConCompuerta(DetectorRoboflow(MODELO_FILE, ETIQUETAS_MODELO))
+    # Calentamiento en segundo plano: hasta que termine no se detectan tarjetas
+    threading.Thread(target=cerebro_ia.calentar, daemon=True).start()
     
     # 2. Inicializar Cámara y Mediapipe
-    if platform.system() == 'Windows':
-        cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-    else:
-        cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, ANCHO_CAM)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, ALTO_CAM)
+    cap = CapturaCamara(0, ANCHO_CAM, ALTO_CAM)
 
     mp_hands = mp.solutions.hands
     hands = mp_hands.Hands(
@@ -34,6 +35,7 @@ def main():
         model_complexity=0, min_detection_confidence=0.5, min_tracking_confidence=0.5
     )
     mp_draw = mp.solutions.drawing_utils
+    planificador = PlanificadorAdaptativo()
 
     # Estado
     frame_count = 0
@@ -44,59 +46,69 @@ def main():
     try:
         print("✅ Bucle principal activo. Presiona 'q' para salir.")
         while True:
-            ret, frame = cap.read()
+            ret, frame, t_captura = cap.leer()
             if not ret: break
             
             frame = cv2.flip(frame, 1)
             frame_count += 1
             
-            # --- LÓGICA (Frame Skipping 1/3) ---
-            if frame_count % 3 == 0:
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
+            # --- LÓGICA (Planificador adaptativo) ---
+            tareas = planificador.decidir(frame)
+            if tareas:
                 # A. Detección IA (Tarjetas)
-                ultimas_cajas = cerebro_ia.detectar(rgb_frame)
+                if "tarjetas" in tareas and cerebro_ia.listo.is_set():
+                    t0 = time.perf_counter()
+                    ultimas_cajas, fresca = cerebro_ia.evaluar(frame, True, t_captura)
+                    if fresca:  # Las cajas repetidas por la compuerta no miden el costo del modelo
+                        planificador.registrar("tarjetas", time.perf_counter() - t0)
                 
                 # B. Detección Mediapipe (Manos)
-                ultimo_resultado_manos = hands.process(rgb_frame)
+                if "manos" in tareas:
+                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    t0 = time.perf_counter()
+                    ultimo_resultado_manos = hands.process(rgb_frame)
+                    planificador.registrar("manos", time.perf_counter() - t0)
+                    planificador.notificar("manos", ultimo_resultado_manos.multi_hand_landmarks)
 
-                # C. Procesamiento de Lógica (Si hay manos)
-                if not ultimo_resultado_manos or not ultimo_resultado_manos.multi_hand_landmarks:
-                    textos_manos = {'Right': "", 'Left': ""}
-                else:
-                    for landmarks, handedness in zip(ultimo_resultado_manos.multi_hand_landmarks, 
-                                                   ultimo_resultado_manos.multi_handedness):
-                        label = handedness.classification[0].label
-                        dedos_estado = manos.analizar_dedos(landmarks.landmark, label)
+                    # C. Procesamiento de Lógica (Si hay manos)
+                    if not ultimo_resultado_manos or not ultimo_resultado_manos.multi_hand_landmarks:
+                        textos_manos = {'Right': "", 'Left': ""}
+                    else:
+                        for landmarks, handedness in zip(ultimo_resultado_manos.multi_hand_landmarks, 
+                                                       ultimo_resultado_manos.multi_handedness):
+                            label = handedness.classification[0].label
+                            dedos_estado = manos.analizar_dedos(landmarks.landmark, label)
                         
-                        # Mano Izquierda (Right en espejo) -> NÚMEROS
-                        if label == 'Right':
-                            cant = sum(dedos_estado)
-                            textos_manos['Right'] = f"Num: {cant}"
-                            if cant > 0: comms.enviar(f"NUMERO_{cant}")
-                            else: comms.enviar("PUÑO_CERRADO")
+                            # Mano Izquierda (Right en espejo) -> NÚMEROS
+                            if label == 'Right':
+                                cant = sum(dedos_estado)
+                                textos_manos['Right'] = f"Num: {cant}"
+                                if cant > 0: comms.enviar(f"NUMERO_{cant}")
+                                else: comms.enviar("PUÑO_CERRADO")
                         
-                        # Mano Derecha (Left en espejo) -> LETRAS
-                        elif label == 'Left':
-                            letra = manos.identificar_letra_mano(dedos_estado, landmarks.landmark)
-                            if letra:
-                                clean_letra = letra.split("_")[1]
-                                textos_manos['Left'] = f"Letra: {clean_letra}"
-                                comms.enviar(clean_letra)
-                            else:
-                                textos_manos['Left'] = "..."
+                            # Mano Derecha (Left en espejo) -> LETRAS
+                            elif label == 'Left':
+                                letra = manos.identificar_letra_mano(dedos_estado, landmarks.landmark)
+                                if letra:
+                                    clean_letra = letra.split("_")[1]
+                                    textos_manos['Left'] = f"Letra: {clean_letra}"
+                                    comms.enviar(clean_letra)
+                                else:
+                                    textos_manos['Left'] = "..."
 
             # --- PROCESAMIENTO TARJETAS (Envío directo desde resultados IA) ---
             # Lo hacemos aquí para aprovechar los datos cacheados
-            if frame_count % 3 == 0:
-                for (_, nombre, _) in ultimas_cajas:
+            if "tarjetas" in tareas:
+                for (_, clase, _) in ultimas_cajas:
+                    nombre = cerebro_ia.etiquetas[clase]
                     # Ejemplo: "Tarjeta_L" -> envía "L"
                     letra_tarjeta = nombre.split("_")[-1]
                     comms.enviar(letra_tarjeta)
 
             # --- DIBUJADO (Renderizado en cada frame) ---
             # 1. Cajas de Tarjetas
-            for (box, nombre, score) in ultimas_cajas:
+            for (box, clase, score) in ultimas_cajas:
+                nombre = cerebro_ia.etiquetas[clase]
                 ymin, xmin, ymax, xmax = box
                 start = (int(xmin * ANCHO_CAM), int(ymin * ALTO_CAM))
                 end = (int(xmax * ANCHO_CAM), int(ymax * ALTO_CAM))
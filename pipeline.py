@@ -0,0 +1,203 @@
+import cv2
+import queue
+import threading
+import time
+
+TAREAS_TODAS = ("tarjetas", "manos")
+TIMEOUT_RESULTADO = 10.0  # Segundos máximos de espera en modo determinista
+
+class ResultadoFrame:
+    """Resultados de ambos modelos para un mismo frame (unidos por frame_id)"""
+    def __init__(self, frame_id, t_captura, tareas):
+        self.frame_id = frame_id
+        self.t_captura = t_captura
+        self.tareas = tareas
+        self.cajas = None
+        self.cajas_frescas = False  # True si el detector corrió sobre este frame (no repitió cajas)
+        self.manos = None
+        self.tiempos = {}  # Latencia por etapa (segundos)
+
+    def completo(self):
+        return all(t in self.tiempos for t in self.tareas)
+
+class PipelineInferencia:
+    """
+    Ejecuta preprocesado, detección de tarjetas (TFLite) y manos (MediaPipe)
+    en hilos separados con colas acotadas. Ambos modelos corren en paralelo
+    sobre el mismo frame y sus resultados se unen por frame_id antes de
+    llamar a la lógica de decisión. Hay a lo sumo tam_cola frames en vuelo
+    (de enviar() hasta su resultado): los que llegan mientras tanto se
+    descartan en vez de esperar en las colas internas.
+    """
+    def __init__(self, detector, hands, logica=None, tam_cola=1):
+        self.detector = detector
+        self.hands = hands
+        self.logica = logica  # callback(ResultadoFrame) en el hilo de unión
+
+        # Colas acotadas: con a lo sumo tam_cola frames en vuelo ninguna etapa se bloquea
+        self.cola_entrada = queue.Queue(maxsize=tam_cola)
+        self.cola_tarjetas = queue.Queue(maxsize=tam_cola)
+        self.cola_manos = queue.Queue(maxsize=tam_cola)
+        self.cola_union = queue.Queue()
+        self.cola_resultados = queue.Queue(maxsize=1)
+
+        self.pendientes = {}
+        self.siguiente_id = 0
+        self.descartados = 0
+        self.max_en_vuelo = tam_cola
+        self.en_vuelo = 0
+        self.lock = threading.Lock()
+        self.running = True
+
+        self.hilos = [
+            threading.Thread(target=self._worker_preproceso, name="preproceso", daemon=True),
+            threading.Thread(target=self._worker_tarjetas, name="tarjetas", daemon=True),
+            threading.Thread(target=self._worker_manos, name="manos", daemon=True),
+            threading.Thread(target=self._worker_union, name="union", daemon=True),
+        ]
+        for h in self.hilos:
+            h.start()
+
+    # --- API PÚBLICA ---
+    def enviar(self, frame_bgr, t_captura=0, tareas=TAREAS_TODAS):
+        """Encola un frame sin bloquear. Retorna False si el pipeline está lleno."""
+        if not tareas:
+            return False
+        with self.lock:
+            if self.en_vuelo >= self.max_en_vuelo:
+                self.descartados += 1
+                return False
+            self.en_vuelo += 1
+        self.siguiente_id += 1
+        item = ResultadoFrame(self.siguiente_id, t_captura, tuple(tareas))
+        # Copia propia: el bucle principal dibuja sobre su frame
+        self.cola_entrada.put_nowait((item, frame_bgr.copy()))
+        return True
+
+    def ocupado(self):
+        """True si el próximo enviar() sería descartado (hay frames sin resultado)"""
+        return self.en_vuelo >= self.max_en_vuelo
+
+    def obtener_resultado(self):
+        """Retorna el último ResultadoFrame completo o None (no bloquea)"""
+        try:
+            return self.cola_resultados.get_nowait()
+        except queue.Empty:
+            return None
+
+    def esperar_resultado(self, timeout=TIMEOUT_RESULTADO):
+        """
+        Bloquea hasta el próximo resultado (modo determinista).
+        Lanza TimeoutError si no llega a tiempo (p.ej. murió un hilo del pipeline).
+        """
+        try:
+            return self.cola_resultados.get(timeout=timeout)
+        except queue.Empty:
+            detenidos = [h.name for h in self.hilos if not h.is_alive()]
+            detalle = f" (hilos detenidos: {', '.join(detenidos)})" if detenidos else ""
+            raise TimeoutError(f"Sin resultado del pipeline en {timeout} s{detalle}") from None
+
+    def cerrar(self):
+        self.running = False
+        for h in self.hilos:
+            h.join(timeout=1)
+
+    # --- ETAPAS ---
+    def _obtener(self, cola):
+        """get() con timeout para poder salir cuando running pasa a False"""
+        while self.running:
+            try:
+                return cola.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return None
+
+    def _worker_preproceso(self):
+        while True:
+            dato = self._obtener(self.cola_entrada)
+            if dato is None: break
+            item, frame_bgr = dato
+
+            self.cola_union.put(("registro", item))
+            # El detector convierte a RGB sobre su entrada reducida: recibe el BGR directo
+            if "tarjetas" in item.tareas:
+                self.cola_tarjetas.put((item.frame_id, item.t_captura, frame_bgr))
+            if "manos" in item.tareas:
+                t0 = time.perf_counter()
+                rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+                item.tiempos["preproceso"] = time.perf_counter() - t0
+                self.cola_manos.put((item.frame_id, rgb))
+
+    def _worker_tarjetas(self):
+        while True:
+            dato = self._obtener(self.cola_tarjetas)
+            if dato is None: break
+            frame_id, t_captura, frame_bgr = dato
+            t0 = time.perf_counter()
+            try:
+                cajas, fresca = self._detectar(frame_bgr, t_captura)
+            except Exception as e:
+                print(f"⚠️ [PIPELINE] Error en tarjetas: {e}")
+                cajas, fresca = [], False
+            self.cola_union.put(("tarjetas", frame_id, (cajas, fresca), time.perf_counter() - t0))
+
+    def _detectar(self, frame_bgr, t_captura):
+        """(cajas, fresca); un detector con compuerta informa si repitió el resultado"""
+        evaluar = getattr(self.detector, "evaluar", None)
+        if evaluar:
+            return evaluar(frame_bgr, True, t_captura)
+        return self.detector.detectar(frame_bgr, es_bgr=True), True
+
+    def _worker_manos(self):
+        while True:
+            dato = self._obtener(self.cola_manos)
+            if dato is None: break
+            frame_id, rgb = dato
+            t0 = time.perf_counter()
+            try:
+                res = self.hands.process(rgb)
+            except Exception as e:
+                print(f"⚠️ [PIPELINE] Error en manos: {e}")
+                res = None
+            self.cola_union.put(("manos", frame_id, res, time.perf_counter() - t0))
+
+    def _worker_union(self):
+        """Une los resultados por frame_id y ejecuta la lógica de decisión"""
+        while True:
+            dato = self._obtener(self.cola_union)
+            if dato is None: break
+
+            if dato[0] == "registro":
+                item = dato[1]
+                self.pendientes[item.frame_id] = item
+                continue
+
+            etapa, frame_id, valor, dt = dato
+            item = self.pendientes.get(frame_id)
+            if item is None: continue
+            if etapa == "tarjetas":
+                item.cajas, item.cajas_frescas = valor
+            else:
+                item.manos = valor
+            item.tiempos[etapa] = dt
+
+            if not item.completo():
+                continue
+            del self.pendientes[frame_id]
+
+            if self.logica:
+                t0 = time.perf_counter()
+                try:
+                    self.logica(item)
+                except Exception as e:
+                    print(f"⚠️ [PIPELINE] Error en lógica: {e}")
+                item.tiempos["logica"] = time.perf_counter() - t0
+
+            # Solo interesa el más reciente: reemplazar el que no se consumió
+            try:
+                self.cola_resultados.get_nowait()
+            except queue.Empty:
+                pass
+            self.cola_resultados.put(item)
+            with self.lock:
+                self.en_vuelo -= 1
@@ -0,0 +1,84 @@
+import cv2
+import time
+
+class MedidorMovimiento:
+    """Energía de cambio entre frames sobre una versión gris reducida"""
+    def __init__(self, tam=(80, 60)):
+        self.tam = tam
+        self.referencia = None
+        self.gris = None
+        self.diff = None
+
+    def medir(self, frame_bgr, avanzar=True):
+        """
+        Retorna la diferencia media (0-255) respecto a la referencia.
+        avanzar=True compara contra el frame anterior; con False la referencia
+        queda fija hasta llamar a fijar_referencia() (el cambio lento se acumula).
+        """
+        # Reducir primero y convertir después: la conversión trabaja sobre 80x60
+        pequeno = cv2.resize(frame_bgr, self.tam, interpolation=cv2.INTER_AREA)
+        self.gris = cv2.cvtColor(pequeno, cv2.COLOR_BGR2GRAY, dst=self.gris)
+
+        if self.referencia is None:
+            self.referencia = self.gris.copy()
+            return 255.0
+
+        self.diff = cv2.absdiff(self.gris, self.referencia, dst=self.diff)
+        if avanzar:
+            self.referencia, self.gris = self.gris, self.referencia
+        return float(cv2.mean(self.diff)[0])
+
+    def fijar_referencia(self):
+        """El último frame medido pasa a ser la referencia"""
+        self.referencia[...] = self.gris
+
+class PlanificadorAdaptativo:
+    """
+    Decide por frame qué modelos ejecutar ('tarjetas', 'manos', ambos o ninguno).
+    Cada tarea tiene un periodo mínimo derivado de su costo medido y del
+    presupuesto de CPU; con escena quieta solo se refresca cada periodo_inactivo.
+    """
+    def __init__(self, presupuesto_cpu=0.6, umbral_movimiento=3.0,
+                 periodo_inactivo=1.0, alfa=0.2, tareas=("tarjetas", "manos")):
+        self.presupuesto_cpu = presupuesto_cpu      # Fracción del tiempo real que puede ocupar cada modelo
+        self.umbral_movimiento = umbral_movimiento  # Diferencia media (0-255) = escena activa
+        self.periodo_inactivo = periodo_inactivo    # Segundos entre refrescos en escena quieta
+        self.alfa = alfa
+        self.tareas = tareas
+
+        self.medidor = MedidorMovimiento()
+        self.costos = {t: 0.0 for t in tareas}      # EMA del costo (segundos)
+        self.ultima_ejecucion = {t: 0.0 for t in tareas}
+        self.hay_objetos = {t: False for t in tareas}
+        self.movimiento = 0.0
+
+    def registrar(self, tarea, dt):
+        """Actualiza el costo medio de una tarea"""
+        if self.costos[tarea] == 0.0:
+            self.costos[tarea] = dt
+        else:
+            self.costos[tarea] += self.alfa * (dt - self.costos[tarea])
+
+    def notificar(self, tarea, hay_objetos):
+        """Indica si la última ejecución encontró algo (manos/tarjetas)"""
+        self.hay_objetos[tarea] = bool(hay_objetos)
+
+    def decidir(self, frame_bgr):
+        """Retorna la tupla de tareas a ejecutar en este frame y las marca como ejecutadas"""
+        ahora = time.time()
+        self.movimiento = self.medidor.medir(frame_bgr)
+        escena_activa = self.movimiento >= self.umbral_movimiento
+
+        tareas = []
+        for t in self.tareas:
+            # Con manos visibles el gesto puede cambiar sin mucho movimiento global
+            activa = escena_activa or (t == "manos" and self.hay_objetos[t])
+            periodo = self.costos[t] / self.presupuesto_cpu
+            if not activa:
+                periodo = max(periodo, self.periodo_inactivo)
+
+            if ahora - self.ultima_ejecucion[t] >= periodo:
+                tareas.append(t)
+                self.ultima_ejecucion[t] = ahora
+
+        return tuple(tareas)
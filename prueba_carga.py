@@ -0,0 +1,135 @@
+import argparse
+import json
+import random
+import sys
+import time
+
+from comunicacion import GestorSerial
+from emulador_pico import EmuladorPico
+import transporte as transportes
+
+# Mezcla de comandos como la genera Sistema Final (gestos, letras, modo y fuego)
+COMANDOS = (["NUMERO_1", "NUMERO_2", "NUMERO_3", "NUMERO_4", "NUMERO_5", "PUÑO_CERRADO"] * 3 +
+            ["L", "O", "V"] * 2 +
+            ["MODO_AUTO", "MODO_MANUAL"] +
+            [f"FUEGO_{z}_{e}" for z in (1, 2, 3) for e in ("ON", "OFF")])
+
+# Ronda con resultado conocido, como la produce el sistema: el cambio de modo y,
+# poco después y sin esperar el ACK, las zonas con fuego. Con tramas o ACKs
+# perdidos, un MODO_* reenviado fuera de orden o ejecutado dos veces apagaría
+# las bombas de fuego encendidas después.
+RONDA = [["MODO_MANUAL"], ["MODO_AUTO"], ["FUEGO_1_ON", "FUEGO_2_OFF", "FUEGO_3_ON"]]
+ESTADO_FINAL = {"modo": "AUTO", "bombas": [1, 0, 1, 0, 0]}
+PAUSA_PASOS = 0.02  # Mayor que ventana_lote: cada paso sale en su propia trama
+MAX_DEBOUNCE = 1.5  # Mayor ventana de CLASES_COMANDO: después de ella nada se filtra
+
+def esperar_vacio(comms, timeout=5.0, quieto=0.05):
+    """
+    Espera a que no queden comandos en cola ni tramas sin ACK durante `quieto`
+    segundos: un lote recién sacado de la cola todavía no figura en pendientes.
+    """
+    limite = time.monotonic() + timeout
+    desde = None
+    while time.monotonic() < limite:
+        ahora = time.monotonic()
+        if comms.pendientes or comms.cola.qsize():
+            desde = None
+        elif desde is None:
+            desde = ahora
+        elif ahora - desde >= quieto:
+            return
+        time.sleep(0.01)
+
+def verificar_estado_final(comms, emulador, rondas):
+    """
+    Repite RONDA y compara el estado de la Pico emulada con ESTADO_FINAL.
+    Una ronda que no llega al estado esperado es un error, salvo que alguna
+    trama se haya dado por perdida tras agotar los reintentos o que la Pico
+    la haya rechazado (bytes perdidos que igual pasan el CRC-8, ~1/256).
+    """
+    resultado = {"esperado": ESTADO_FINAL, "rondas": rondas, "correctas": 0,
+                 "con_perdidas": 0, "incorrectas": 0, "obtenido": None}
+    time.sleep(MAX_DEBOUNCE)  # Que la carga previa no filtre los comandos de la ronda
+    for _ in range(rondas):
+        perdidas = comms.contadores["perdidas"] + comms.contadores["rechazadas"]
+        for paso in RONDA:
+            for comando in paso:
+                comms.enviar(comando)
+            time.sleep(PAUSA_PASOS)
+        esperar_vacio(comms)
+        time.sleep(0.25)  # Reintentos o duplicados atrasados llegan; vence el debounce de FUEGO
+
+        estado = emulador.estado()
+        obtenido = {clave: estado[clave] for clave in ESTADO_FINAL}
+        if obtenido == ESTADO_FINAL:
+            resultado["correctas"] += 1
+        elif comms.contadores["perdidas"] + comms.contadores["rechazadas"] > perdidas:
+            resultado["con_perdidas"] += 1
+        else:
+            resultado["incorrectas"] += 1
+            resultado["obtenido"] = obtenido
+    resultado["ok"] = resultado["incorrectas"] == 0
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de GestorSerial contra el emulador de la Pico")
+    parser.add_argument("--transporte", choices=["memoria", "pty", "tcp"], default="pty")
+    parser.add_argument("--tasa", type=float, default=200.0, help="Comandos por segundo ofrecidos")
+    parser.add_argument("--duracion", type=float, default=5.0)
+    parser.add_argument("--baudios", type=int, default=115200, help="Velocidad simulada (solo memoria)")
+    parser.add_argument("--tiempo-comando", type=float, default=0.0, help="Ejecución simulada por comando (s)")
+    parser.add_argument("--prob-corrupcion", type=float, default=0.0, help="Bytes perdidos en cada sentido")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--rondas", type=int, default=10, help="Rondas de verificación del estado final")
+    parser.add_argument("--salida", help="Archivo JSON (por defecto stdout)")
+    args = parser.parse_args()
+
+    lado_host, lado_pico = transportes.crear_par(args.transporte, timeout=0.2, baudios=args.baudios)
+    emulador = EmuladorPico(lado_pico, args.tiempo_comando, args.prob_corrupcion, args.semilla)
+    comms = GestorSerial(transporte=lado_host, reloj=time.monotonic)
+
+    azar = random.Random(args.semilla)
+    periodo = 1.0 / args.tasa
+    ofrecidos = 0
+    inicio = time.monotonic()
+    proximo = inicio
+    while time.monotonic() - inicio < args.duracion:
+        comms.enviar(azar.choice(COMANDOS))
+        ofrecidos += 1
+        proximo += periodo
+        espera = proximo - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+    transcurrido = time.monotonic() - inicio
+
+    # Dejar que lleguen los últimos ACK
+    esperar_vacio(comms)
+    estado_final = verificar_estado_final(comms, emulador, args.rondas)
+
+    reporte = {
+        "transporte": args.transporte,
+        "tasa_ofrecida": args.tasa,
+        "comandos_ofrecidos": ofrecidos,
+        "duracion_s": round(transcurrido, 2),
+        "serial": comms.estadisticas(),
+        "emulador": emulador.estado(),
+        "estado_final": estado_final,
+    }
+    reporte["bytes_por_s"] = round(reporte["emulador"]["bytes_rx"] / transcurrido, 1)
+    reporte["comandos_ejecutados_por_s"] = round(reporte["emulador"]["comandos"] / transcurrido, 1)
+
+    comms.cerrar()
+    emulador.cerrar()
+
+    texto = json.dumps(reporte, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    print(texto)
+    if not estado_final["ok"]:
+        print(f"❌ [CARGA] {estado_final['incorrectas']} rondas con estado final incorrecto "
+              f"(último: {estado_final['obtenido']}, esperado: {estado_final['esperado']})")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import threading
+import numpy as np
+
+# Pista = detección + identificador estable y aciertos acumulados
+DTYPE_PISTA = np.dtype([('caja', np.float32, (4,)), ('clase', np.int32), ('score', np.float32),
+                        ('id', np.int32), ('aciertos', np.int32)])
+
+def matriz_iou(a, b):
+    """IoU entre todas las cajas [ymin, xmin, ymax, xmax] de a (N,4) y b (M,4) -> (N, M)"""
+    ymin = np.maximum(a[:, None, 0], b[None, :, 0])
+    xmin = np.maximum(a[:, None, 1], b[None, :, 1])
+    ymax = np.minimum(a[:, None, 2], b[None, :, 2])
+    xmax = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(ymax - ymin, 0, None) * np.clip(xmax - xmin, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+class RastreadorCajas:
+    """
+    Seguimiento de tarjetas estilo SORT entre inferencias.
+    - Asociación por IoU (misma clase) contra la posición predicha.
+    - Modelo de velocidad constante por esquina, en unidades por segundo,
+      para interpolar las cajas en los frames sin inferencia.
+    - Una pista solo se confirma tras min_aciertos asociaciones.
+    actualizar() corre en el hilo del pipeline y predecir() en el de dibujo.
+    """
+    def __init__(self, iou_min=0.3, min_aciertos=3, max_perdidos=3,
+                 alfa_velocidad=0.5, max_extrapolacion=0.5):
+        self.iou_min = iou_min
+        self.min_aciertos = min_aciertos
+        self.max_perdidos = max_perdidos            # Inferencias sin asociar antes de borrar la pista
+        self.alfa_velocidad = alfa_velocidad        # Suavizado de la velocidad
+        self.max_extrapolacion = max_extrapolacion  # Segundos máximos de extrapolación
+        self.lock = threading.Lock()
+        self.siguiente_id = 1
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self.lock:
+            self.pistas = np.empty(0, dtype=DTYPE_PISTA)
+            self.velocidades = np.empty((0, 4), dtype=np.float32)
+            self.t_ultima = np.empty(0, dtype=np.float64)
+            self.perdidos = np.empty(0, dtype=np.int32)
+
+    def _extrapolar(self, t):
+        dt = np.clip(t - self.t_ultima, 0.0, self.max_extrapolacion)
+        return np.clip(self.pistas['caja'] + self.velocidades * dt[:, None].astype(np.float32), 0.0, 1.0)
+
+    def _asociar(self, predichas, detecciones):
+        """Asociación voraz por IoU decreciente -> lista de (pista, detección)"""
+        if len(predichas) == 0 or len(detecciones) == 0:
+            return []
+        iou = matriz_iou(predichas, detecciones['caja'])
+        iou[self.pistas['clase'][:, None] != detecciones['clase'][None, :]] = 0.0
+
+        pares = []
+        usadas_p, usadas_d = set(), set()
+        for k in np.argsort(-iou, axis=None):
+            p, d = np.unravel_index(k, iou.shape)
+            if iou[p, d] < self.iou_min: break
+            if p in usadas_p or d in usadas_d: continue
+            pares.append((p, d))
+            usadas_p.add(p)
+            usadas_d.add(d)
+        return pares
+
+    def actualizar(self, detecciones, t):
+        """
+        Incorpora las detecciones de una inferencia (DTYPE_DETECCION) tomada en t.
+        Retorna las pistas confirmadas que fueron vistas en esta inferencia.
+        """
+        with self.lock:
+            pares = self._asociar(self._extrapolar(t), detecciones)
+            asociadas = np.zeros(len(self.pistas), dtype=bool)
+            nuevas = np.ones(len(detecciones), dtype=bool)
+
+            for p, d in pares:
+                caja = detecciones['caja'][d]
+                dt = t - self.t_ultima[p]
+                if dt > 0:
+                    v = (caja - self.pistas['caja'][p]) / dt
+                    self.velocidades[p] += self.alfa_velocidad * (v - self.velocidades[p])
+                self.pistas['caja'][p] = caja
+                self.pistas['score'][p] = detecciones['score'][d]
+                self.pistas['aciertos'][p] += 1
+                self.t_ultima[p] = t
+                self.perdidos[p] = 0
+                asociadas[p] = True
+                nuevas[d] = False
+
+            self.perdidos[~asociadas] += 1
+            vivas = self.perdidos <= self.max_perdidos
+
+            # Detecciones sin pista: pistas nuevas (sin confirmar, velocidad 0)
+            n = int(nuevas.sum())
+            altas = np.zeros(n, dtype=DTYPE_PISTA)
+            for campo in ('caja', 'clase', 'score'):
+                altas[campo] = detecciones[campo][nuevas]
+            altas['id'] = np.arange(self.siguiente_id, self.siguiente_id + n)
+            altas['aciertos'] = 1
+            self.siguiente_id += n
+
+            self.pistas = np.concatenate([self.pistas[vivas], altas])
+            self.velocidades = np.concatenate([self.velocidades[vivas], np.zeros((n, 4), dtype=np.float32)])
+            self.t_ultima = np.concatenate([self.t_ultima[vivas], np.full(n, t)])
+            asociadas = np.concatenate([asociadas[vivas], np.ones(n, dtype=bool)])
+            self.perdidos = np.concatenate([self.perdidos[vivas], np.zeros(n, dtype=np.int32)])
+
+            return self.pistas[asociadas & (self.pistas['aciertos'] >= self.min_aciertos)].copy()
+
+    def con_perdidos(self):
+        """True si alguna pista no se vio en la última inferencia y todavía no se borró"""
+        with self.lock:
+            return bool((self.perdidos > 0).any())
+
+    def predecir(self, t):
+        """Pistas confirmadas con la caja interpolada al instante t (para dibujar)"""
+        with self.lock:
+            confirmadas = self.pistas['aciertos'] >= self.min_aciertos
+            resultado = self.pistas[confirmadas].copy()
+            resultado['caja'] = self._extrapolar(t)[confirmadas]
+            return resultado
@@ -0,0 +1,399 @@
+import asyncio
+import collections
+import concurrent.futures
+import json
+import os
+import platform
+import time
+
+import cv2
+
+import protocolo
+import transporte as transportes
+from comunicacion import CLASES_COMANDO, clave_comando
+from pipeline import ResultadoFrame, TAREAS_TODAS
+
+try:
+    import serial_asyncio  # pyserial-asyncio (opcional)
+except ImportError:
+    serial_asyncio = None
+
+# os.openpty, tty y los pipes del event loop solo existen en POSIX
+PTY_DISPONIBLE = platform.system() != 'Windows'
+
+# --- TRANSPORTE SERIAL ASÍNCRONO ---
+async def abrir_serial(puerto, baudrate, transporte=None, pty=False):
+    """
+    Retorna (reader, escribir, cerrar). Usa, en orden: el transporte inyectado,
+    un pty local si se pidió (para conectar el emulador), pyserial-asyncio si
+    está instalado o pyserial con lecturas en un hilo. Lanza OSError si no se
+    pudo abrir nada; el gestor pasa entonces a Modo Simulación.
+    """
+    if transporte is None and pty:
+        return await _abrir_pty()
+    if transporte is None and serial_asyncio is not None:
+        try:
+            reader, writer = await serial_asyncio.open_serial_connection(url=puerto, baudrate=baudrate)
+        except Exception as e:
+            raise OSError(e) from e
+        print(f"✅ [ASYNC] Puerto {puerto} abierto.")
+        return reader, writer.write, writer.close
+    if transporte is None:
+        try:
+            transporte = transportes.abrir_serial(puerto, baudrate, timeout=0.1)
+        except Exception as e:  # También ImportError si falta pyserial
+            raise OSError(e) from e
+        print(f"✅ [ASYNC] Puerto {puerto} abierto (pyserial).")
+    reader = LectorBloqueante(transporte)
+
+    def cerrar():
+        transporte.close()
+        reader.ejecutor.shutdown(wait=False)
+    return reader, transporte.write, cerrar
+
+class LectorBloqueante:
+    """
+    reader.read() de asyncio sobre un transporte bloqueante (pyserial o los de
+    transporte.py): cada lectura corre en un hilo propio y vuelve al vencer el
+    timeout del transporte, así el loop nunca se bloquea.
+    """
+    def __init__(self, transporte):
+        self.transporte = transporte
+        self.ejecutor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="serial")
+
+    def _leer(self):
+        return self.transporte.read(self.transporte.in_waiting or 1)
+
+    async def read(self, n=-1):
+        """Bytes disponibles; b'' cuando el transporte se cierra"""
+        loop = asyncio.get_running_loop()
+        while self.transporte.is_open:
+            try:
+                datos = await loop.run_in_executor(self.ejecutor, self._leer)
+            except Exception:
+                break  # Puerto cerrado durante la lectura
+            if datos: return datos
+        return b""
+
+async def _abrir_pty():
+    if not PTY_DISPONIBLE:
+        raise OSError(f"no hay pty local en {platform.system()}")
+    import tty
+    maestro, esclavo = os.openpty()
+    tty.setraw(esclavo)
+    print(f"🔌 [ASYNC] pty local en {os.ttyname(esclavo)} (conectar ahí el emulador de la Pico)")
+
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    archivo = os.fdopen(maestro, "rb", buffering=0)
+    transporte, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), archivo)
+
+    def escribir(datos):
+        try:
+            os.write(maestro, datos)
+        except BlockingIOError:
+            pass  # Nadie lee el pty y el buffer se llenó: la trama vence sin ACK
+
+    def cerrar():
+        transporte.close()
+        os.close(esclavo)
+    return reader, escribir, cerrar
+
+class GestorSerialAsync:
+    """
+    Versión asyncio de GestorSerial (misma API enviar/cerrar/estadisticas).
+    El agrupado, el debounce y los timeouts de ACK son timers del event loop
+    (call_later) en vez de hilos que consultan colas con timeout. Igual que
+    GestorSerial, hay una sola trama en vuelo: la siguiente sale con su ACK.
+    enviar() debe llamarse desde el hilo del loop.
+    """
+    def __init__(self, baudrate=115200, registro=None, reloj=time.time, ventana_lote=0.005,
+                 timeout_ack=0.25, max_reintentos=2, transporte=None, puerto=None, pty=False):
+        self.puerto = puerto or ('COM3' if platform.system() == 'Windows' else '/dev/serial0')
+        # Transporte inyectable como en GestorSerial; pty=True crea un pty local para el emulador
+        self.transporte = transporte
+        self.pty = pty
+        self.baudrate = baudrate
+        self.reloj = reloj
+        self.ventana_lote = ventana_lote
+        self.timeout_ack = timeout_ack
+        self.max_reintentos = max_reintentos
+        self.registro = open(registro, "w", encoding="utf-8") if registro else None
+
+        self.loop = None
+        self.cerrado = False
+        self.escribir = None
+        self.cerrar_transporte = None
+        self.tarea_lector = None
+
+        self.cola = {}           # clave -> [prioridad, orden, llegada, (op, arg)]
+        self.orden = 0
+        self.timer_lote = None
+        self.bloqueados = {}     # clave -> (comando, timer de debounce)
+        self.seq = 0
+        self.pendientes = {}     # seq -> [t_envio, trama, intentos, timer, comandos]
+        self.rtts = collections.deque(maxlen=200)
+        self.duraciones = collections.deque(maxlen=200)
+        self.reemplazados = 0
+        self.contadores = {"enviadas": 0, "confirmadas": 0, "reintentos": 0, "perdidas": 0,
+                           "obsoletas": 0, "rechazadas": 0, "nacks": 0, "errores_crc": 0,
+                           "malformadas": 0, "descartadas": 0}
+
+    async def iniciar(self):
+        self.loop = asyncio.get_running_loop()
+        try:
+            reader, self.escribir, self.cerrar_transporte = await abrir_serial(
+                self.puerto, self.baudrate, self.transporte, self.pty)
+        except OSError as e:
+            # Como GestorSerial sin puerto: la visión sigue, los comandos se cuentan y descartan
+            print(f"⚠️ [ASYNC] Error puerto ({e}). Modo Simulación: los comandos se descartan.")
+            return
+        self.tarea_lector = asyncio.create_task(self._leer(reader))
+
+    # --- ENVÍO ---
+    def enviar(self, comando):
+        try:
+            op, arg = protocolo.codificar_comando(comando)
+        except ValueError as e:
+            print(f"⚠️ [UART] {e}")
+            return
+        clave = clave_comando(op, arg)
+        _, prioridad, debounce = CLASES_COMANDO[op]
+
+        # Debounce por clave: el timer libera la clave al vencer la ventana
+        bloqueado = self.bloqueados.get(clave)
+        if bloqueado and bloqueado[0] == comando:
+            return
+        if bloqueado:
+            bloqueado[1].cancel()
+        self.bloqueados[clave] = (comando, self.loop.call_later(debounce, self.bloqueados.pop, clave, None))
+
+        print(f"📤 [UART] Enviando: '{comando}'")
+        if clave in self.cola:
+            self.cola[clave][2:] = [self.orden, (op, arg)]  # Conserva su lugar en la cola
+            self.reemplazados += 1
+        else:
+            self.cola[clave] = [prioridad, self.orden, self.orden, (op, arg)]
+        self.orden += 1
+        if self.registro:
+            self.registro.write(json.dumps({"t": self.reloj(), "cmd": comando}, ensure_ascii=False) + "\n")
+        if self.timer_lote is None:
+            self.timer_lote = self.loop.call_later(self.ventana_lote, self._vaciar)
+
+    def _vaciar(self):
+        """Escribe lo pendiente en una trama, por prioridad (con una trama en vuelo espera su ACK)"""
+        self.timer_lote = None
+        if self.escribir is None:
+            self.contadores["descartadas"] += len(self.cola)
+            self.cola.clear()
+            return
+        if self.pendientes or not self.cola: return
+        # La prioridad elige qué entra; dentro de la trama, orden de llegada (ver GestorSerial)
+        claves = sorted(self.cola, key=lambda k: self.cola[k][:2])[:protocolo.MAX_COMANDOS]
+        lote = [comando for _, comando in sorted(self.cola.pop(k)[2:] for k in claves)]
+        seq = self.seq
+        self.seq = (self.seq + 1) % protocolo.SEQ_DESCONOCIDO
+        trama = protocolo.empaquetar(lote, seq)
+        self.pendientes[seq] = [time.monotonic(), trama, 1,
+                                self.loop.call_later(self.timeout_ack, self._vencio, seq), lote]
+        self.escribir(trama)
+        self.contadores["enviadas"] += 1
+
+    def _liberar(self):
+        """La trama en vuelo se resolvió (ACK, NACK o pérdida): sale lo acumulado"""
+        if self.timer_lote is None:
+            self._vaciar()
+
+    def _vencio(self, seq):
+        pendiente = self.pendientes.get(seq)
+        if pendiente is None: return
+        # Lo que tiene un comando más nuevo de la misma clave en la cola no se reenvía
+        vigentes = [c for c in pendiente[4] if clave_comando(*c) not in self.cola]
+        if not vigentes or pendiente[2] > self.max_reintentos:
+            del self.pendientes[seq]
+            if vigentes:
+                self.contadores["perdidas"] += 1
+                print(f"⚠️ [UART] Trama {seq} sin confirmar tras {pendiente[2]} intentos")
+            else:
+                self.contadores["obsoletas"] += 1
+            self._liberar()
+            return
+        if len(vigentes) < len(pendiente[4]):
+            # Mismo SEQ: si la Pico ya ejecutó la original, solo repite el ACK
+            pendiente[1] = protocolo.empaquetar(vigentes, seq)
+            pendiente[4] = vigentes
+        pendiente[0] = time.monotonic()
+        pendiente[2] += 1
+        pendiente[3] = self.loop.call_later(self.timeout_ack, self._vencio, seq)
+        self.escribir(pendiente[1])
+        self.contadores["reintentos"] += 1
+
+    # --- RECEPCIÓN ---
+    async def _leer(self, reader):
+        lector = protocolo.LectorTramas()
+        while True:
+            datos = await reader.read(256)
+            if not datos: break
+            for payload in lector.alimentar(datos):
+                try:
+                    tipo, seq, info = protocolo.decodificar_payload(payload)
+                except protocolo.TramaInvalida:
+                    self.contadores["malformadas"] += 1
+                    continue
+                if tipo == protocolo.TIPO_ACK:
+                    pendiente = self.pendientes.pop(seq, None)
+                    if pendiente is None: continue
+                    pendiente[3].cancel()
+                    self.rtts.append(time.monotonic() - pendiente[0])
+                    self.duraciones.append(info[1])
+                    self.contadores["confirmadas"] += 1
+                    self._liberar()
+                elif tipo == protocolo.TIPO_NACK:
+                    self.contadores["nacks"] += 1
+                    if info in (protocolo.ERROR_CRC, protocolo.ERROR_FORMATO):
+                        for s in list(self.pendientes):
+                            self.pendientes[s][3].cancel()
+                            self._vencio(s)
+                    elif seq in self.pendientes:
+                        self.pendientes.pop(seq)[3].cancel()
+                        self.contadores["rechazadas"] += 1
+                        print(f"⚠️ [UART] La Pico rechazó la trama {seq} (código {info})")
+                        self._liberar()
+            self.contadores["errores_crc"] = lector.errores_crc
+
+    def estadisticas(self):
+        rtts = sorted(self.rtts)
+        resumen = dict(self.contadores, pendientes=len(self.pendientes), reemplazados=self.reemplazados)
+        if rtts:
+            resumen.update(
+                rtt_p50_ms=round(rtts[len(rtts) // 2] * 1000, 2),
+                rtt_p95_ms=round(rtts[min(len(rtts) - 1, int(len(rtts) * 0.95))] * 1000, 2),
+                rtt_max_ms=round(rtts[-1] * 1000, 2),
+                ejecucion_media_us=round(sum(self.duraciones) / len(self.duraciones), 1),
+            )
+        return resumen
+
+    def cerrar(self):
+        # Se llama dentro del loop y otra vez desde SistemaSeguridad.cerrar()
+        if self.cerrado: return
+        self.cerrado = True
+        if self.timer_lote:
+            self.timer_lote.cancel()
+            self._vaciar()
+        if self.tarea_lector:
+            self.tarea_lector.cancel()
+        if self.cerrar_transporte:
+            self.cerrar_transporte()
+        if self.contadores["enviadas"] or self.contadores["descartadas"]:
+            print(f"📊 [UART] {self.estadisticas()}")
+        if self.registro:
+            self.registro.close()
+
+# --- BUCLE DE VISIÓN ---
+class RuntimeAsync:
+    """
+    Ejecuta un SistemaSeguridad sobre un único event loop: la captura y los
+    modelos corren en executors, la lógica, el fuego y el dibujado en el
+    hilo del loop (el mismo que llama a comms.enviar).
+    """
+    def __init__(self, sistema):
+        self.sistema = sistema
+        self.ejecutor_captura = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="captura")
+        self.ejecutor_ia = concurrent.futures.ThreadPoolExecutor(2, thread_name_prefix="ia")
+        self.tarea_inferencia = None
+        self.frame_id = 0
+        self.descartados = 0
+
+    async def _medir(self, funcion, *args):
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        resultado = await loop.run_in_executor(self.ejecutor_ia, funcion, *args)
+        return resultado, time.perf_counter() - t0
+
+    async def _inferir(self, frame_bgr, t_captura, tareas):
+        s = self.sistema
+        self.frame_id += 1
+        res = ResultadoFrame(self.frame_id, t_captura, tareas)
+        trabajos = {}
+        if "tarjetas" in tareas:
+            trabajos["tarjetas"] = self._medir(s.cerebro_ia.evaluar, frame_bgr, True, t_captura)
+        if "manos" in tareas:
+            rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+            trabajos["manos"] = self._medir(s.hands.process, rgb)
+
+        try:
+            salidas = await asyncio.gather(*trabajos.values())
+        except Exception as e:
+            print(f"⚠️ [ASYNC] Error en inferencia: {e}")
+            return
+        for tarea, (salida, dt) in zip(trabajos, salidas):
+            res.tiempos[tarea] = dt
+            if tarea == "tarjetas": res.cajas, res.cajas_frescas = salida
+            else: res.manos = salida
+
+        s.aplicar_resultado(res)
+        s.latencia_decision = time.time() - res.t_captura
+
+    def _revisar_inferencia(self, tarea):
+        """Nadie espera la tarea suelta: sin esto un error en aplicar_resultado se pierde"""
+        if tarea.cancelled(): return
+        error = tarea.exception()
+        if error is not None:
+            print(f"⚠️ [ASYNC] Error en inferencia: {type(error).__name__}: {error}")
+
+    async def ejecutar(self):
+        s = self.sistema
+        loop = asyncio.get_running_loop()
+        await s.comms.iniciar()
+        print("✅ Sistema Listo (asyncio).")
+
+        while True:
+            ok, frame, t_captura = await loop.run_in_executor(self.ejecutor_captura, s.cap.leer)
+            if not ok: break
+            frame = cv2.flip(frame, 1)
+            s.t_captura = t_captura
+            s.frame_count += 1
+
+            if not s.modelos_listos():
+                pass  # Modelos cargando en segundo plano: solo se transmite
+            elif s.determinista:
+                # Replay a máxima velocidad: todos los modelos y sin descartes
+                await self._inferir(frame.copy(), t_captura, TAREAS_TODAS)
+            elif self.tarea_inferencia is None or self.tarea_inferencia.done():
+                tareas = s.planificador.decidir(frame)
+                if tareas:
+                    self.tarea_inferencia = asyncio.create_task(self._inferir(frame.copy(), t_captura, tareas))
+                    self.tarea_inferencia.add_done_callback(self._revisar_inferencia)
+            else:
+                self.descartados += 1
+
+            if s.modo_automatico:
+                s.procesar_zonas_fuego(frame)
+
+            if not s.salida.presentar(frame, s.dibujar): break
+            await asyncio.sleep(0)
+
+        if self.tarea_inferencia:
+            await asyncio.wait([self.tarea_inferencia])  # Su error ya se informó
+
+    def cerrar(self):
+        self.ejecutor_captura.shutdown(wait=True)
+        self.ejecutor_ia.shutdown(wait=True)
+
+def ejecutar(sistema, depurar=False):
+    """Punto de entrada: corre el sistema hasta que termina la fuente o se cierra la salida"""
+    runtime = RuntimeAsync(sistema)
+
+    async def principal():
+        if depurar:
+            # Avisa de callbacks que bloquean el loop más de 50 ms
+            loop = asyncio.get_running_loop()
+            loop.set_debug(True)
+            loop.slow_callback_duration = 0.05
+        try:
+            await runtime.ejecutar()
+        finally:
+            runtime.cerrar()
+            sistema.comms.cerrar()  # Con el loop vivo para vaciar lo pendiente
+
+    asyncio.run(principal())
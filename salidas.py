@@ -0,0 +1,112 @@
+import cv2
+import numpy as np
+import os
+import platform
+import threading
+import time
+
+class SalidaNula:
+    """Modo headless: no se dibuja ni se muestra nada"""
+    def presentar(self, frame, dibujar):
+        return True
+
+    def cerrar(self):
+        pass
+
+class SalidaVentana:
+    """Ventana local con cv2.imshow (debe usarse desde el hilo principal)"""
+    def __init__(self, titulo, fps_max=None):
+        self.titulo = titulo
+        self.periodo = 1.0 / fps_max if fps_max else 0
+        self.ultimo = 0
+
+    def presentar(self, frame, dibujar):
+        ahora = time.time()
+        if ahora - self.ultimo < self.periodo:
+            return True
+        self.ultimo = ahora
+
+        dibujar(frame)
+        cv2.imshow(self.titulo, frame)
+        return not (cv2.waitKey(1) & 0xFF == ord('q'))
+
+    def cerrar(self):
+        cv2.destroyAllWindows()
+
+class SalidaMJPEG:
+    """
+    Graba el video anotado a un archivo MJPEG desde un hilo propio.
+    El bucle solo copia el frame; el dibujado y la codificación corren fuera.
+    """
+    def __init__(self, ruta, fps=10):
+        self.ruta = ruta
+        self.fps = fps
+        self.periodo = 1.0 / fps
+        self.ultimo = 0
+        self.writer = None
+        self.buffer = None
+        self.dibujar = None
+
+        self.evento = threading.Event()
+        self.lock = threading.Lock()
+        self.running = True
+        self.hilo = threading.Thread(target=self._worker_escritura, daemon=True)
+        self.hilo.start()
+
+    def presentar(self, frame, dibujar):
+        ahora = time.time()
+        if ahora - self.ultimo < self.periodo:
+            return True
+        self.ultimo = ahora
+
+        with self.lock:
+            if self.buffer is None or self.buffer.shape != frame.shape:
+                self.buffer = np.empty_like(frame)
+            np.copyto(self.buffer, frame)
+            self.dibujar = dibujar
+        self.evento.set()
+        return True
+
+    def _worker_escritura(self):
+        frame = None
+        while self.running:
+            if not self.evento.wait(timeout=0.5): continue
+            self.evento.clear()
+
+            with self.lock:
+                if frame is None or frame.shape != self.buffer.shape:
+                    frame = np.empty_like(self.buffer)
+                np.copyto(frame, self.buffer)
+                dibujar = self.dibujar
+
+            dibujar(frame)
+            if self.writer is None:
+                alto, ancho = frame.shape[:2]
+                fourcc = cv2.VideoWriter_fourcc(*'MJPG')
+                self.writer = cv2.VideoWriter(self.ruta, fourcc, self.fps, (ancho, alto))
+                print(f"🎞️ [SALIDA] Grabando en {self.ruta} a {self.fps} FPS")
+            self.writer.write(frame)
+
+        if self.writer: self.writer.release()
+
+    def cerrar(self):
+        self.running = False
+        if self.hilo.is_alive():
+            self.hilo.join(timeout=1)
+
+def hay_pantalla():
+    if platform.system() != 'Linux':
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+def crear_salida(tipo, titulo="PiArchitect", archivo="salida.avi", fps=None):
+    """tipo: 'ninguna', 'ventana' o 'mjpeg'"""
+    if tipo == 'ventana' and not hay_pantalla():
+        print("⚠️ [SALIDA] Sin pantalla disponible. Modo headless.")
+        tipo = 'ninguna'
+
+    if tipo == 'ventana':
+        return SalidaVentana(titulo, fps)
+    if tipo == 'mjpeg':
+        return SalidaMJPEG(archivo, fps or 10)
+    return SalidaNula()
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import runtime_async
+from comunicacion import ColaPrioridad
+import transporte as transportes
+from emulador_pico import EmuladorPico
+
+async def esperar(condicion, timeout=2.0):
+    limite = time.monotonic() + timeout
+    while not condicion() and time.monotonic() < limite:
+        await asyncio.sleep(0.01)
+
+def vaciar(cola):
+    return [cola.get(timeout=0) for _ in range(cola.qsize())]
+
+def test_cola_reemplaza_y_conserva_el_lugar():
+    cola = ColaPrioridad()
+    assert not cola.put("LETRA", 2, "L")
+    assert not cola.put("BOMBA", 2, "NUMERO_1")
+    assert cola.put("LETRA", 2, "O")  # Reemplaza a "L" sin pasar detrás de la bomba
+
+    assert cola.qsize() == 2
+    assert [comando for _, comando in vaciar(cola)] == ["O", "NUMERO_1"]
+
+def test_cola_entrega_por_prioridad():
+    cola = ColaPrioridad()
+    cola.put("BOMBA", 2, "NUMERO_1")
+    cola.put("MODO", 1, "MODO_AUTO")
+    cola.put(("FUEGO", 3), 0, "FUEGO_3_ON")
+    cola.put(("FUEGO", 1), 0, "FUEGO_1_ON")
+
+    assert [comando for _, comando in vaciar(cola)] == ["FUEGO_3_ON", "FUEGO_1_ON", "MODO_AUTO", "NUMERO_1"]
+
+def test_cola_reemplazo_toma_el_orden_de_llegada_del_nuevo():
+    # Dentro de la trama se ejecuta por llegada: el MODO que llegó después
+    # del FUEGO_ON debe seguir ejecutándose después aunque conserve su lugar
+    cola = ColaPrioridad()
+    cola.put("MODO", 1, "MODO_AUTO")
+    cola.put(("FUEGO", 1), 0, "FUEGO_1_ON")
+    cola.put("MODO", 1, "MODO_MANUAL")
+
+    assert [comando for _, comando in sorted(vaciar(cola))] == ["FUEGO_1_ON", "MODO_MANUAL"]
+
+def test_async_confirma_con_transporte_inyectado():
+    lado_host, lado_pico = transportes.par_memoria(timeout=0.05)
+    emulador = EmuladorPico(lado_pico)
+    comms = runtime_async.GestorSerialAsync(transporte=lado_host, reloj=time.monotonic)
+
+    async def principal():
+        await comms.iniciar()
+        comms.enviar("MODO_AUTO")
+        await esperar(lambda: comms.contadores["confirmadas"] == 1)
+        comms.enviar("FUEGO_2_ON")
+        await esperar(lambda: comms.contadores["confirmadas"] == 2)
+        comms.cerrar()
+    try:
+        asyncio.run(principal())
+    finally:
+        emulador.cerrar()
+
+    assert comms.contadores["perdidas"] == 0
+    assert emulador.estado()["modo"] == "AUTO"
+    assert emulador.estado()["bombas"] == [0, 1, 0, 0, 0]
+
+def test_async_sin_puerto_descarta_y_lo_cuenta(monkeypatch, capsys):
+    # Sin pyserial-asyncio y sin puerto: nada de pty implícito, Modo Simulación
+    monkeypatch.setattr(runtime_async, "serial_asyncio", None)
+    comms = runtime_async.GestorSerialAsync(puerto="/dev/no_existe")
+
+    async def principal():
+        await comms.iniciar()
+        comms.enviar("FUEGO_1_ON")
+        await asyncio.sleep(0.02)
+        comms.cerrar()
+    asyncio.run(principal())
+
+    salida = capsys.readouterr().out
+    assert "pty" not in salida
+    assert comms.contadores["descartadas"] == 1
+    assert comms.contadores["enviadas"] == 0
+    assert "descartadas': 1" in salida
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from gestos import MotorGestos
+from main_con_t_fuego import GESTOS_FILE
+
+def mascara(dedos):
+    """[pulgar, indice, medio, anular, menique] -> máscara de analizar_dedos_lote"""
+    return sum(d << i for i, d in enumerate(dedos))
+
+def puntos_mano(pinza=False):
+    """Landmarks separados; con pinza, la punta del índice (8) toca la del pulgar (4)"""
+    puntos = np.zeros((21, 3), dtype=np.float32)
+    puntos[:, 0] = np.arange(21) * 0.1
+    if pinza:
+        puntos[8] = puntos[4]
+    return puntos
+
+@pytest.fixture(scope="module")
+def motor():
+    return MotorGestos(GESTOS_FILE)
+
+@pytest.mark.parametrize("mano, dedos, pinza, gesto", [
+    ("Right", [1, 1, 0, 0, 1], False, "CAMBIO_MODO"),
+    ("Left", [1, 1, 0, 0, 1], True, "CAMBIO_MODO"),  # La primera regla gana
+    ("Left", [1, 1, 0, 0, 0], True, "LETRA_O"),
+    ("Left", [1, 1, 0, 0, 0], False, "LETRA_L"),
+    ("Left", [0, 1, 1, 0, 0], False, "LETRA_V"),
+    ("Left", [1, 1, 1, 0, 0], False, "LETRA_V"),
+    ("Left", [0, 0, 0, 0, 0], False, None),
+    ("Right", [0, 0, 0, 0, 0], False, "PUÑO_CERRADO"),
+    ("Right", [0, 1, 1, 0, 0], False, "NUMERO_2"),
+    ("Right", [1, 1, 1, 1, 1], False, "NUMERO_5"),
+])
+def test_tabla_de_gestos(motor, mano, dedos, pinza, gesto):
+    puntos = puntos_mano(pinza)[None]
+    assert motor.clasificar(puntos, [mano], np.array([mascara(dedos)])) == [gesto]
+
+def test_lote_de_manos(motor):
+    puntos = np.stack([puntos_mano(), puntos_mano(pinza=True)])
+    mascaras = np.array([mascara([0, 0, 0, 0, 0]), mascara([0, 1, 0, 0, 0])])
+    assert motor.clasificar(puntos, ["Right", "Left"], mascaras) == ["PUÑO_CERRADO", "LETRA_O"]
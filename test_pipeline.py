@@ -0,0 +1,37 @@
+import statistics
+import time
+
+import numpy as np
+
+from pipeline import PipelineInferencia, TAREAS_TODAS
+
+class DetectorLento:
+    def detectar(self, frame, es_bgr=False):
+        time.sleep(0.1)
+        return []
+
+class ManosRapidas:
+    def process(self, rgb):
+        return None
+
+def test_latencia_con_etapa_lenta():
+    # Bucle a 30 fps como SistemaSeguridad.procesar: solo envía si no está ocupado
+    pipeline = PipelineInferencia(DetectorLento(), ManosRapidas())
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    latencias = []
+    try:
+        inicio = time.monotonic()
+        while time.monotonic() - inicio < 1.5:
+            if not pipeline.ocupado():
+                pipeline.enviar(frame, time.monotonic(), TAREAS_TODAS)
+            res = pipeline.obtener_resultado()
+            if res:
+                latencias.append(time.monotonic() - res.t_captura)
+            time.sleep(1 / 30)
+    finally:
+        pipeline.cerrar()
+
+    # Un frame en vuelo: la decisión llega ~100 ms después de la captura
+    # (con frames esperando en las colas internas eran ~400 ms)
+    assert len(latencias) >= 8
+    assert statistics.median(latencias[2:]) < 0.2
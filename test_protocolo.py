@@ -0,0 +1,64 @@
+import os
+import time
+
+import pytest
+
+import protocolo
+import transporte as transportes
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+def test_copia_del_firmware_identica():
+    # La Pico solo ve firmware_pico/: su copia debe ser la misma que usa la Pi
+    with open(os.path.join(RAIZ, "protocolo.py"), "rb") as a, \
+         open(os.path.join(RAIZ, "firmware_pico", "protocolo.py"), "rb") as b:
+        assert a.read() == b.read()
+
+@pytest.mark.parametrize("comando", ["NUMERO_256", "NUMERO_-1", "NUMERO_x", "FUEGO_128_ON", "FUEGO_-1_OFF"])
+def test_argumento_fuera_de_rango(comando):
+    with pytest.raises(ValueError):
+        protocolo.codificar_comando(comando)
+
+@pytest.mark.parametrize("comando", ["MODO_AUTO", "NUMERO_5", "NUMERO_255", "FUEGO_3_ON", "FUEGO_127_OFF", "V"])
+def test_ida_y_vuelta(comando):
+    op, arg = protocolo.codificar_comando(comando)
+    payload = protocolo.LectorTramas().alimentar(protocolo.empaquetar([(op, arg)], 7))[0]
+    tipo, seq, comandos = protocolo.decodificar_payload(payload)
+    assert (tipo, seq) == (protocolo.TIPO_COMANDOS, 7)
+    assert protocolo.decodificar_comando(*comandos[0]) == comando
+
+@pytest.mark.parametrize("payload", [
+    bytes((protocolo.TIPO_ACK, 0)),
+    bytes((protocolo.TIPO_ACK, 0, 1, 2, 3)),
+    bytes((protocolo.TIPO_NACK, 0)),
+    bytes((protocolo.TIPO_COMANDOS, 0, protocolo.OP_NUMERO)),
+    bytes((0x7E, 0)),
+])
+def test_payload_truncado(payload):
+    # CRC válido (LectorTramas lo entrega) pero imposible de decodificar
+    assert protocolo.LectorTramas().alimentar(protocolo._trama(payload)) == [payload]
+    with pytest.raises(protocolo.TramaInvalida):
+        protocolo.decodificar_payload(payload)
+
+def test_lector_sobrevive_a_un_ack_truncado():
+    from comunicacion import GestorSerial
+    lado_host, lado_pico = transportes.par_memoria(timeout=0.05)
+    comms = GestorSerial(transporte=lado_host, reloj=time.monotonic)
+    try:
+        lado_pico.write(protocolo._trama(bytes((protocolo.TIPO_ACK, 0))))
+        comms.enviar("MODO_AUTO")
+        lector = protocolo.LectorTramas()
+        limite = time.monotonic() + 2
+        payloads = []
+        while not payloads and time.monotonic() < limite:
+            payloads = lector.alimentar(lado_pico.read(64))
+        _, seq, _ = protocolo.decodificar_payload(payloads[0])
+        lado_pico.write(protocolo.empaquetar_ack(seq, 0, 10))
+        while comms.contadores["confirmadas"] == 0 and time.monotonic() < limite:
+            time.sleep(0.01)
+
+        assert comms.hilo_lector.is_alive()
+        assert comms.contadores["malformadas"] == 1
+        assert comms.contadores["confirmadas"] == 1
+    finally:
+        comms.cerrar()
@@ -0,0 +1,85 @@
+import types
+
+import numpy as np
+
+from detector_ia import DTYPE_DETECCION, DetectorConCompuerta
+from main_con_t_fuego import SistemaSeguridad
+from pipeline import ResultadoFrame
+from planificador import PlanificadorAdaptativo
+from rastreador_cajas import RastreadorCajas
+
+class DetectorFalso:
+    """Una tarjeta en las primeras `veces` invocaciones, nada después"""
+    def __init__(self, veces):
+        self.veces = veces
+        self.llamadas = 0
+
+    def detectar(self, frame, es_bgr=False):
+        self.llamadas += 1
+        cajas = np.zeros(1 if self.llamadas <= self.veces else 0, dtype=DTYPE_DETECCION)
+        cajas['caja'] = [0.2, 0.2, 0.6, 0.6]
+        cajas['score'] = 0.9
+        return cajas
+
+def sistema_falso(compuerta):
+    """Lo mínimo de SistemaSeguridad que usa aplicar_resultado"""
+    confirmadas = []
+    sistema = types.SimpleNamespace(
+        cerebro_ia=compuerta,
+        planificador=PlanificadorAdaptativo(),
+        rastreador_cajas=RastreadorCajas(min_aciertos=3),
+        procesar_tarjetas=lambda pistas: confirmadas.extend(pistas['id']),
+    )
+    return sistema, confirmadas
+
+def aplicar(sistema, compuerta, frame, frame_id, t):
+    res = ResultadoFrame(frame_id, t, ("tarjetas",))
+    res.cajas, res.cajas_frescas = compuerta.evaluar(frame, True, t)
+    res.tiempos["tarjetas"] = 0.01
+    SistemaSeguridad.aplicar_resultado(sistema, res)
+
+def test_cajas_repetidas_no_confirman_la_tarjeta():
+    detector = DetectorFalso(veces=1)  # Una sola detección espuria
+    compuerta = DetectorConCompuerta(detector)
+    sistema, confirmadas = sistema_falso(compuerta)
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)  # Escena estática
+
+    for i in range(10):
+        aplicar(sistema, compuerta, frame, i + 1, i * 0.1)
+
+    assert detector.llamadas == 1
+    assert compuerta.omitidas == 9
+    assert confirmadas == []
+    assert sistema.rastreador_cajas.pistas['aciertos'].tolist() == [1]
+
+def test_inferencias_reales_confirman_la_tarjeta():
+    detector = DetectorFalso(veces=3)
+    # max_antiguedad=0: el modelo corre en cada frame aunque la escena no cambie
+    compuerta = DetectorConCompuerta(detector, max_antiguedad=0.0)
+    sistema, confirmadas = sistema_falso(compuerta)
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+    for i in range(3):
+        aplicar(sistema, compuerta, frame, i + 1, i * 0.1)
+
+    assert compuerta.inferencias == 3
+    assert confirmadas == [1]
+
+def test_tarjeta_retirada_deja_de_dibujarse():
+    detector = DetectorFalso(veces=5)
+    compuerta = DetectorConCompuerta(detector)  # max_antiguedad de 2 s
+    sistema, confirmadas = sistema_falso(compuerta)
+    vacio = np.zeros((480, 640, 3), dtype=np.uint8)
+    ultima_dibujada = None
+
+    for i in range(90):  # 3 s a 30 fps; la tarjeta se retira en el frame 5
+        t = i / 30
+        # Con la tarjeta delante la escena cambia en cada frame; después queda quieta
+        frame = np.full_like(vacio, 100 + 20 * (i % 2)) if i < 5 else vacio
+        aplicar(sistema, compuerta, frame, i + 1, t)
+        if len(sistema.rastreador_cajas.predecir(t)):
+            ultima_dibujada = t
+
+    assert set(confirmadas) == {1}
+    # Las pistas con fallos fuerzan inferencias: se borra en unos frames, no en 3 x 2 s
+    assert ultima_dibujada < 5 / 30 + 0.2
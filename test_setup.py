@@ -1,21 +1,40 @@
+import importlib
 import sys
-import cv2
-import mediapipe as mp
-import face_recognition
-import tensorflow as tf
-import numpy as np
+import time
+
+# Cada librería se importa recién al verificarla: un fallo no impide revisar el resto
+# y se ve cuánto tarda cada import pesado.
+fallos = []
+
+def verificar(nombre_modulo, descripcion, version=True):
+    t0 = time.perf_counter()
+    try:
+        modulo = importlib.import_module(nombre_modulo)
+    except Exception as e:
+        print(f"❌ {descripcion}: {e}")
+        fallos.append(descripcion)
+        return None
+    dt = time.perf_counter() - t0
+    detalle = getattr(modulo, "__version__", "Listo") if version else "Listo"
+    print(f"✅ {descripcion}: {detalle} ({dt:.2f} s)")
+    return modulo
 
 print(f"✅ Python: {sys.version.split()[0]}")
-print(f"✅ OpenCV: {cv2.__version__}")
-print(f"✅ Mediapipe: {mp.__version__}")
-print(f"✅ Face Recognition: Listo (Dlib backend ok)")
-print(f"✅ TensorFlow: {tf.__version__}")
+verificar("numpy", "NumPy")
+verificar("cv2", "OpenCV")
+verificar("mediapipe", "Mediapipe")
+verificar("face_recognition", "Face Recognition (Dlib backend)", version=False)
+tf = verificar("tensorflow", "TensorFlow")
 
-try:
-    # Prueba crítica: Cargar el intérprete Lite (lo usaremos en la Pi)
-    interpreter = tf.lite.Interpreter(model_content=None)
-    print("✅ TFLite Runtime: Funcional")
-except Exception as e:
-    print(f"⚠️ TFLite Warning: {e}")
+if tf is not None:
+    try:
+        # Prueba crítica: Cargar el intérprete Lite (lo usaremos en la Pi)
+        interpreter = tf.lite.Interpreter(model_content=None)
+        print("✅ TFLite Runtime: Funcional")
+    except Exception as e:
+        print(f"⚠️ TFLite Warning: {e}")
 
-print("\n🎉 ¡ENTORNO WINDOWS 100% OPERATIVO!")
\ No newline at end of file
+if fallos:
+    print(f"\n⚠️ Faltan: {', '.join(fallos)}")
+else:
+    print("\n🎉 ¡ENTORNO WINDOWS 100% OPERATIVO!")
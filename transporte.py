@@ -0,0 +1,157 @@
+import os
+import select
+import socket
+import threading
+import time
+
+# Todos los transportes exponen la parte de la API de pyserial que usa
+# GestorSerial: write(), read(n), in_waiting, is_open y close().
+
+class TransporteFd:
+    """Transporte sobre un descriptor de archivo (lado de un pty o un tty abierto por ruta)"""
+    def __init__(self, fd, timeout=1.0, nombre="fd"):
+        self.fd = fd
+        self.timeout = timeout
+        self.nombre = nombre
+        self.is_open = True
+
+    @property
+    def in_waiting(self):
+        listo, _, _ = select.select([self.fd], [], [], 0)
+        return 1 if listo else 0  # Sin FIONREAD portable: al menos un byte
+
+    def read(self, n=1):
+        """Bloquea hasta timeout; retorna b'' si no llegó nada"""
+        listo, _, _ = select.select([self.fd], [], [], self.timeout)
+        if not listo: return b""
+        try:
+            return os.read(self.fd, max(n, 256))
+        except OSError:
+            return b""  # El otro extremo del pty se cerró
+
+    def write(self, datos):
+        vista = memoryview(datos)
+        while vista:
+            enviados = os.write(self.fd, vista)
+            vista = vista[enviados:]
+        return len(datos)
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+            os.close(self.fd)
+
+class TransporteSocket(TransporteFd):
+    """Transporte sobre un socket TCP conectado"""
+    def __init__(self, sock, timeout=1.0, nombre="tcp"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        super().__init__(sock.fileno(), timeout, nombre)
+
+    def read(self, n=1):
+        listo, _, _ = select.select([self.sock], [], [], self.timeout)
+        if not listo: return b""
+        try:
+            return self.sock.recv(max(n, 256))
+        except OSError:
+            return b""
+
+    def write(self, datos):
+        self.sock.sendall(datos)
+        return len(datos)
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+            self.sock.close()
+
+class TransporteMemoria:
+    """
+    Un extremo de un enlace en memoria (ver par_memoria). Con baudios > 0
+    write() tarda lo que tardaría la UART real (10 bits por byte, 8N1).
+    """
+    def __init__(self, entrada, salida, timeout=1.0, baudios=0, nombre="memoria"):
+        self.entrada = entrada  # (bytearray, Condition) que lee este extremo
+        self.salida = salida
+        self.timeout = timeout
+        self.baudios = baudios
+        self.nombre = nombre
+        self.is_open = True
+
+    @property
+    def in_waiting(self):
+        return len(self.entrada[0])
+
+    def read(self, n=1):
+        buffer, condicion = self.entrada
+        with condicion:
+            if not buffer and not condicion.wait_for(lambda: buffer or not self.is_open, self.timeout):
+                return b""
+            datos = bytes(buffer[:max(n, 1)])
+            del buffer[:len(datos)]
+            return datos
+
+    def write(self, datos):
+        if self.baudios:
+            time.sleep(len(datos) * 10 / self.baudios)
+        buffer, condicion = self.salida
+        with condicion:
+            buffer.extend(datos)
+            condicion.notify_all()
+        return len(datos)
+
+    def close(self):
+        self.is_open = False
+        for _, condicion in (self.entrada, self.salida):
+            with condicion:
+                condicion.notify_all()
+
+# --- CONSTRUCCIÓN ---
+def abrir_serial(puerto, baudrate=115200, timeout=1.0):
+    """Puerto real o URL de pyserial como socket://host:puerto (pyserial se importa recién acá)"""
+    import serial
+    if "://" in puerto:
+        return serial.serial_for_url(puerto, baudrate=baudrate, timeout=timeout)
+    return serial.Serial(puerto, baudrate, timeout=timeout)
+
+def abrir_ruta(ruta, timeout=1.0):
+    """Abre un tty existente por ruta, p.ej. el lado esclavo de un pty"""
+    import tty
+    fd = os.open(ruta, os.O_RDWR | os.O_NOCTTY)
+    tty.setraw(fd)
+    return TransporteFd(fd, timeout, ruta)
+
+def par_pty(timeout=1.0):
+    """(extremo maestro, extremo esclavo) de un pty en modo crudo"""
+    import tty
+    maestro, esclavo = os.openpty()
+    tty.setraw(esclavo)
+    ruta = os.ttyname(esclavo)
+    return TransporteFd(maestro, timeout, "pty"), TransporteFd(esclavo, timeout, ruta)
+
+def par_tcp(timeout=1.0):
+    """Dos extremos conectados por TCP en 127.0.0.1 (puerto efímero)"""
+    servidor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    servidor.bind(("127.0.0.1", 0))
+    servidor.listen(1)
+    cliente = socket.create_connection(servidor.getsockname())
+    aceptado, _ = servidor.accept()
+    servidor.close()
+    return TransporteSocket(cliente, timeout), TransporteSocket(aceptado, timeout)
+
+def conectar_tcp(host, puerto, timeout=1.0):
+    return TransporteSocket(socket.create_connection((host, puerto)), timeout, f"tcp://{host}:{puerto}")
+
+def par_memoria(timeout=1.0, baudios=0):
+    """Dos extremos en memoria; baudios > 0 simula la velocidad de la UART"""
+    a = (bytearray(), threading.Condition())
+    b = (bytearray(), threading.Condition())
+    return (TransporteMemoria(a, b, timeout, baudios, "memoria-a"),
+            TransporteMemoria(b, a, timeout, baudios, "memoria-b"))
+
+def crear_par(tipo, timeout=1.0, baudios=0):
+    """(extremo para GestorSerial, extremo para el emulador) según tipo"""
+    if tipo == "pty": return par_pty(timeout)
+    if tipo == "tcp": return par_tcp(timeout)
+    if tipo == "memoria": return par_memoria(timeout, baudios)
+    raise ValueError(f"Tipo de transporte desconocido: {tipo}")